@@ -1,6 +1,10 @@
 # database/database.py
+import asyncio
 import os
-from pymongo import MongoClient
+import threading
+import time
+from pymongo import AsyncMongoClient
+from pymongo.monitoring import ConnectionPoolListener
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,11 +12,230 @@ load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME")
 
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
+# Connection pool settings (one pool per worker process)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 50))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 60000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 10000))
+
+
+class PoolStats(ConnectionPoolListener):
+    """Tracks connection pool usage so worker and pool sizes can be tuned"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.check_out_failed = 0
+
+    def connection_created(self, event):
+        with self._lock:
+            self.created += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.closed += 1
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.waiting += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checked_out += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.check_out_failed += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "max_pool_size": MONGO_MAX_POOL_SIZE,
+                "min_pool_size": MONGO_MIN_POOL_SIZE,
+                "checked_out": self.checked_out,
+                "waiting": self.waiting,
+                "created": self.created,
+                "closed": self.closed,
+                "open": self.created - self.closed,
+                "check_out_failed": self.check_out_failed,
+            }
+
+
+pool_stats = PoolStats()
+
+# The client is owned by the FastAPI lifespan in main.py (see connect/close)
+client = None
+db = None
+
+
+def connect(db_name: str = None) -> AsyncMongoClient:
+    """Creates the shared client. Called once per process at startup; db_name overrides DB_NAME."""
+    global client, db
+    if client is None:
+        client = AsyncMongoClient(
+            MONGO_URI,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+            serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            event_listeners=[pool_stats],
+        )
+        db = client[db_name or DB_NAME]
+    return client
+
+
+async def close():
+    """Closes the shared client. Called once per process at shutdown."""
+    global client, db
+    if client is not None:
+        await client.close()
+        client = None
+        db = None
+
+
+def get_db():
+    if db is None:
+        raise RuntimeError("MongoDB client is not connected; call database.connect() first")
+    return db
+
+
+class LazyCollection:
+    """
+    Stand-in for a collection on the shared client.
+    Routers import these at module level; the real collection is resolved
+    on each use, so they always talk to the client created at startup.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_db()[self.name], attr)
+
 
 # Define all collections here
-events_collection = db["events"]
-volunteers_collection = db["volunteers"]
-organizations_collection = db["organizations"]
-refresh_tokens_collection = db["refresh_tokens"]
\ No newline at end of file
+events_collection = LazyCollection(os.getenv("EVENTS_COLLECTION", "events"))
+volunteers_collection = LazyCollection(os.getenv("VOLUNTEERS_COLLECTION", "volunteers"))
+organizations_collection = LazyCollection(os.getenv("ORGANIZATIONS_COLLECTION", "organizations"))
+refresh_tokens_collection = LazyCollection(os.getenv("REFRESH_TOKENS_COLLECTION", "refresh_tokens"))
+geocode_cache_collection = LazyCollection(os.getenv("GEOCODE_CACHE_COLLECTION", "geocode_cache"))
+dead_letter_jobs_collection = LazyCollection(os.getenv("DEAD_LETTER_JOBS_COLLECTION", "dead_letter_jobs"))
+registrations_collection = LazyCollection(os.getenv("REGISTRATIONS_COLLECTION", "registrations"))
+stats_collection = LazyCollection(os.getenv("STATS_COLLECTION", "stats"))
+counters_collection = LazyCollection(os.getenv("COUNTERS_COLLECTION", "counters"))
+uploads_collection = LazyCollection(os.getenv("UPLOADS_COLLECTION", "uploads"))
+idempotency_keys_collection = LazyCollection(os.getenv("IDEMPOTENCY_KEYS_COLLECTION", "idempotency_keys"))
+
+
+async def _bench(requests: int, concurrency: int, db_name: str, events: int):
+    """
+    Compares throughput of the hot GET /events page query issued with blocking
+    pymongo calls on the event loop (what the routers used to do) against the
+    shared async client. Seeds db_name, which must not be DB_NAME, and drops it after.
+    """
+    import statistics
+    from pymongo import MongoClient
+
+    if db_name == DB_NAME:
+        raise SystemExit("Refusing to seed and drop the application database; pass another --db")
+    connect(db_name)
+    sync_client = MongoClient(MONGO_URI)
+    collection_name = events_collection.name
+    sync_events = sync_client[db_name][collection_name]
+    query, sort = {"status": "Open"}, [("date", 1), ("event_id", 1)]
+
+    async def blocking_request():
+        return list(sync_events.find(query).sort(sort).limit(20))
+
+    async def async_request():
+        return await db[collection_name].find(query).sort(sort).limit(20).to_list(None)
+
+    async def run(handler) -> dict:
+        gate = asyncio.Semaphore(concurrency)
+        latencies = []
+        stalls = []
+        done = False
+
+        async def request():
+            async with gate:
+                start = time.perf_counter()
+                await handler()
+                latencies.append(time.perf_counter() - start)
+
+        async def watch_loop():
+            # How late a 1 ms timer fires: how long other requests sat behind a blocking call
+            while not done:
+                start = time.perf_counter()
+                await asyncio.sleep(0.001)
+                stalls.append(time.perf_counter() - start - 0.001)
+
+        watcher = asyncio.create_task(watch_loop())
+        start = time.perf_counter()
+        await asyncio.gather(*(request() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+        done = True
+        await watcher
+        cuts = statistics.quantiles(latencies, n=100)
+        return {
+            "requests/s": round(requests / elapsed, 1),
+            "p50_ms": round(cuts[49] * 1000, 2),
+            "p99_ms": round(cuts[98] * 1000, 2),
+            "max_loop_stall_ms": round(max(stalls, default=0) * 1000, 2),
+        }
+
+    try:
+        sync_events.insert_many([
+            {"event_id": i, "event_name": f"Event {i}", "status": "Open" if i % 3 else "Closed",
+             "date": f"2030-{1 + i % 12:02d}-{1 + i % 28:02d}", "category": "Environment"}
+            for i in range(1, events + 1)
+        ])
+        sync_events.create_index([("status", 1), ("date", 1), ("event_id", 1)])
+        await async_request()
+        before = await run(blocking_request)
+        after = await run(async_request)
+        print(f"{requests} requests, {concurrency} concurrent, over {events} events")
+        print(f"blocking pymongo: {before}")
+        print(f"async client:     {after}")
+        print(f"speedup: {after['requests/s'] / before['requests/s']:.1f}x")
+    finally:
+        sync_client.drop_database(db_name)
+        sync_client.close()
+        await close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Blocking pymongo vs async client throughput against MONGO_URI")
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    parser.add_argument("-c", "--concurrency", type=int, default=50)
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--db", default="pledgeit_bench", help="scratch database, dropped afterwards")
+    args = parser.parse_args()
+    asyncio.run(_bench(args.requests, args.concurrency, args.db, args.events))
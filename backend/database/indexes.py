@@ -0,0 +1,161 @@
+# database/indexes.py
+"""
+Declarative index spec for every collection, applied at startup.
+
+Run `python -m database.indexes` to sync indexes by hand, or
+`python -m database.indexes --check` to explain() the hot queries and
+report any that still fall back to a collection scan.
+"""
+import asyncio
+import logging
+import sys
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+from database import database
+from database.database import (
+    events_collection,
+    volunteers_collection,
+    organizations_collection,
+    refresh_tokens_collection,
+    geocode_cache_collection,
+    registrations_collection,
+    idempotency_keys_collection,
+)
+
+logger = logging.getLogger(__name__)
+
+INDEXES = {
+    events_collection.name: [
+        IndexModel([("event_id", ASCENDING)], name="event_id_unique", unique=True, sparse=True),
+        IndexModel([("organization", ASCENDING), ("date", ASCENDING)], name="organization_date"),
+        IndexModel([("date", ASCENDING), ("event_id", ASCENDING)], name="date_event_id"),
+        IndexModel([("category", ASCENDING), ("date", ASCENDING)], name="category_date"),
+        IndexModel([("expireAt", ASCENDING)], name="expire_at_ttl", expireAfterSeconds=0),
+        IndexModel(
+            [("event_name", TEXT), ("description", TEXT), ("skills_required", TEXT), ("city", TEXT)],
+            name="event_text",
+            weights={"event_name": 10, "skills_required": 5, "city": 3, "description": 1},
+        ),
+        IndexModel([("event_name_normalized", ASCENDING)], name="event_name_prefix"),
+        IndexModel([("location", GEOSPHERE)], name="location_2dsphere"),
+    ],
+    volunteers_collection.name: [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("points", DESCENDING)], name="points_desc"),
+    ],
+    organizations_collection.name: [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("name", ASCENDING)], name="name"),
+    ],
+    refresh_tokens_collection.name: [
+        IndexModel([("refresh_token", ASCENDING)], name="refresh_token"),
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+    geocode_cache_collection.name: [
+        IndexModel([("expireAt", ASCENDING)], name="expire_at_ttl", expireAfterSeconds=0),
+    ],
+    registrations_collection.name: [
+        # One registration per volunteer per event; also serves membership checks
+        IndexModel([("event_id", ASCENDING), ("volunteer_id", ASCENDING)], name="event_volunteer_unique", unique=True),
+        # Attendee paging in sign-up order
+        IndexModel(
+            [("event_id", ASCENDING), ("registered_at", ASCENDING), ("volunteer_id", ASCENDING)],
+            name="event_registered_at",
+        ),
+    ],
+    idempotency_keys_collection.name: [
+        IndexModel([("expireAt", ASCENDING)], name="expire_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+# Representative shapes of the hot queries, used by --check
+HOT_QUERIES = [
+    (events_collection.name, {"event_id": 1}, None),
+    (events_collection.name, {"organization": "PledgeIt"}, None),
+    # Public listings also filter on processing_status, checked against each index entry's document
+    (events_collection.name, {"date": {"$gte": "2025-01-01"}, "processing_status": {"$in": [None, "ready"]}}, None),
+    (events_collection.name, {"category": "Education", "date": {"$gte": "2025-01-01"}}, None),
+    (events_collection.name, {"event_name_normalized": {"$regex": "^beach"}}, None),
+    (volunteers_collection.name, {"email": "volunteer@example.com"}, None),
+    (volunteers_collection.name, {}, [("points", DESCENDING)]),
+    (organizations_collection.name, {"email": "organization@example.com"}, None),
+    (refresh_tokens_collection.name, {"refresh_token": "token"}, None),
+    (registrations_collection.name, {"event_id": 1, "volunteer_id": "volunteer"}, None),
+    (registrations_collection.name, {"event_id": 1}, [("registered_at", ASCENDING), ("volunteer_id", ASCENDING)]),
+]
+
+
+async def sync_indexes(spec: dict = None):
+    """Creates any missing indexes from the spec. Existing indexes are left alone."""
+    db = database.get_db()
+    for collection_name, models in (spec or INDEXES).items():
+        try:
+            created = await db[collection_name].create_indexes(models)
+            logger.info(f"Indexes in sync for {collection_name}: {created}")
+        except OperationFailure as e:
+            # e.g. duplicate emails already stored, or an index with the same name but different options
+            logger.error(f"Failed to sync indexes for {collection_name}: {e}")
+
+
+def _plan_stages(plan) -> list:
+    """Collects every stage name in an explain() plan tree"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def check_indexes(queries: list = None, slow_ms: int = 100) -> list:
+    """
+    Explains each hot query and returns a report entry per query.
+    A query is flagged when its winning plan contains a COLLSCAN or it
+    takes longer than slow_ms.
+    """
+    db = database.get_db()
+    report = []
+    for collection_name, query, sort in (queries or HOT_QUERIES):
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        stats = explain.get("executionStats", {})
+        entry = {
+            "collection": collection_name,
+            "query": query,
+            "sort": sort,
+            "stages": stages,
+            "docs_examined": stats.get("totalDocsExamined"),
+            "execution_ms": stats.get("executionTimeMillis"),
+        }
+        entry["flagged"] = "COLLSCAN" in stages or (entry["execution_ms"] or 0) > slow_ms
+        report.append(entry)
+    return report
+
+
+async def _main(check: bool):
+    database.connect()
+    try:
+        if check:
+            report = await check_indexes()
+            for entry in report:
+                marker = "SLOW/UNINDEXED" if entry["flagged"] else "ok"
+                print(f"[{marker}] {entry['collection']} {entry['query']} sort={entry['sort']} "
+                      f"stages={entry['stages']} docs_examined={entry['docs_examined']} "
+                      f"ms={entry['execution_ms']}")
+            return 1 if any(entry["flagged"] for entry in report) else 0
+        await sync_indexes()
+        return 0
+    finally:
+        await database.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main("--check" in sys.argv[1:])))
@@ -0,0 +1,141 @@
+# database/migrations.py
+"""
+One-off data migrations.
+
+Run from the backend directory:
+    python -m database.migrations <name>      run one migration
+    python -m database.migrations --list      show available migrations
+Every migration is idempotent, so re-running one is safe.
+"""
+import asyncio
+import logging
+import sys
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+from database import database
+from database.database import events_collection, registrations_collection, volunteers_collection
+from services.search import normalize_text
+from services.geocoding import geo_point
+
+logger = logging.getLogger(__name__)
+
+# Number of updates sent per bulk_write
+BATCH_SIZE = 1000
+
+
+async def _flush(collection, operations: list) -> int:
+    if not operations:
+        return 0
+    result = await collection.bulk_write(operations, ordered=False)
+    return result.modified_count
+
+
+async def backfill_event_name_normalized() -> int:
+    """Adds event_name_normalized (used by autocomplete) to events missing it"""
+    cursor = events_collection.find(
+        {"event_name": {"$exists": True}, "event_name_normalized": {"$exists": False}},
+        {"event_name": 1}
+    )
+    operations, modified = [], 0
+    async for event in cursor:
+        operations.append(UpdateOne(
+            {"_id": event["_id"]},
+            {"$set": {"event_name_normalized": normalize_text(event.get("event_name") or "")}}
+        ))
+        if len(operations) >= BATCH_SIZE:
+            modified += await _flush(events_collection, operations)
+            operations = []
+    modified += await _flush(events_collection, operations)
+    return modified
+
+
+async def backfill_event_location() -> int:
+    """Adds the GeoJSON location (used by /events/nearby) to events that have coordinates"""
+    cursor = events_collection.find(
+        {
+            "latitude": {"$type": "number"},
+            "longitude": {"$type": "number"},
+            "location": {"$exists": False},
+        },
+        {"latitude": 1, "longitude": 1}
+    )
+    operations, modified = [], 0
+    async for event in cursor:
+        operations.append(UpdateOne(
+            {"_id": event["_id"]},
+            {"$set": {"location": geo_point(event["latitude"], event["longitude"])}}
+        ))
+        if len(operations) >= BATCH_SIZE:
+            modified += await _flush(events_collection, operations)
+            operations = []
+    modified += await _flush(events_collection, operations)
+    return modified
+
+
+async def move_registrations_to_collection() -> int:
+    """Moves each event's embedded registered_volunteers array into the registrations collection"""
+    cursor = events_collection.find(
+        {"registered_volunteers": {"$exists": True}},
+        {"event_id": 1, "registered_volunteers": 1}
+    )
+    # Original sign-up times were never stored, so migrated registrations share the migration time
+    migrated_at = datetime.now(timezone.utc)
+    registrations, events, modified = [], [], 0
+    async for event in cursor:
+        volunteer_ids = list(dict.fromkeys(event.get("registered_volunteers") or []))
+        for volunteer_id in volunteer_ids:
+            registrations.append(UpdateOne(
+                {"event_id": event["event_id"], "volunteer_id": volunteer_id},
+                {"$setOnInsert": {"registered_at": migrated_at}},
+                upsert=True
+            ))
+        # Registrations are written before the array is dropped, so a crash part way is safe to re-run
+        events.append(UpdateOne(
+            {"_id": event["_id"]},
+            {"$set": {"total_registered_volunteers": len(volunteer_ids)}, "$unset": {"registered_volunteers": ""}}
+        ))
+        if len(registrations) >= BATCH_SIZE or len(events) >= BATCH_SIZE:
+            await _flush(registrations_collection, registrations)
+            modified += await _flush(events_collection, events)
+            registrations, events = [], []
+    await _flush(registrations_collection, registrations)
+    modified += await _flush(events_collection, events)
+    return modified
+
+
+async def backfill_events_attended() -> int:
+    """Adds the events_attended counter (shown on the leaderboard) to volunteers missing it"""
+    result = await volunteers_collection.update_many(
+        {"events_attended": {"$exists": False}},
+        [{"$set": {"events_attended": {"$size": {"$ifNull": ["$attended_events", []]}}}}]
+    )
+    return result.modified_count
+
+
+MIGRATIONS = {
+    "event_name_normalized": backfill_event_name_normalized,
+    "event_location": backfill_event_location,
+    "registrations": move_registrations_to_collection,
+    "events_attended": backfill_events_attended,
+}
+
+
+async def run(name: str) -> int:
+    database.connect()
+    try:
+        modified = await MIGRATIONS[name]()
+        logger.info(f"Migration {name} done: {modified} documents updated")
+        return modified
+    finally:
+        await database.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = sys.argv[1:]
+    if not args or args[0] == "--list" or args[0] not in MIGRATIONS:
+        print("Available migrations:")
+        for name, migration in MIGRATIONS.items():
+            print(f"  {name}: {migration.__doc__}")
+        sys.exit(0 if args and args[0] == "--list" else 1)
+    asyncio.run(run(args[0]))
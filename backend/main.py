@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
@@ -5,6 +6,22 @@ from authlib.integrations.starlette_client import OAuth
 from fastapi.staticfiles import StaticFiles
 from routes.events import router as event_router
 from routes.auth import router as auth_router
+from routes.metrics import router as metrics_router
+from routes.dashboard import router as dashboard_router
+from database import database
+from database.indexes import sync_indexes
+from services.email_handler import get_email_service
+from services.event_pipeline import processing_sweeper
+from services.geocoding import geocoder
+from services.hashing import password_hasher
+from services.id_allocator import event_id_allocator
+from services.jobs import job_queue
+from services.leaderboard import leaderboard
+from services.mail_transport import mail_outbox, SMTPConnectionPool
+from services.response_cache import response_cache
+from services.stats import stats_reconciler
+from services.uploads import UPLOAD_DIR, RequestSizeLimitMiddleware, image_store
+import logging
 import os
 from dotenv import load_dotenv
 
@@ -15,12 +32,50 @@ load_dotenv()
 SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
 PORT = int(os.environ.get("PORT", 8000))  # Render provides PORT
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One MongoDB client (and connection pool) per worker, shared by all routers
+    database.connect()
+    try:
+        await sync_indexes()
+    except Exception as e:
+        logging.error(f"Index sync failed at startup: {e}")
+    try:
+        # Takes over the legacy event_counter document before anything lists events
+        await event_id_allocator.seed()
+    except Exception as e:
+        logging.error(f"Event id counter seeding failed at startup: {e}")
+    await job_queue.start()
+    # Re-queues or fails events whose jobs were lost when a worker last stopped
+    await processing_sweeper.start()
+    await mail_outbox.start(SMTPConnectionPool.from_env())
+    await stats_reconciler.start()
+    await leaderboard.start()
+    # Compile email templates now rather than on the first event created
+    get_email_service().precompile_templates()
+    yield
+    await leaderboard.stop()
+    await stats_reconciler.stop()
+    await processing_sweeper.stop()
+    # Drains queued jobs (with a timeout) while the mail outbox is still running
+    await job_queue.stop()
+    await mail_outbox.stop()
+    await geocoder.aclose()
+    await response_cache.aclose()
+    password_hasher.shutdown()
+    image_store.shutdown()
+    await database.close()
+
 app = FastAPI(
     title="PledgeIt Volunteer Events API",
     description="API for managing volunteer events, including event creation, filtering, geocoding, and image uploads.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Reject oversized uploads while they stream in (added first so CORS headers still wrap the 413)
+app.add_middleware(RequestSizeLimitMiddleware)
+
 # Configure CORS (adjust allowed origins in production)
 app.add_middleware(
     CORSMiddleware,
@@ -28,6 +83,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],  
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Configure SessionMiddleware
@@ -36,13 +92,15 @@ app.add_middleware(
 )
 
 # Ensure the uploads directory exists
-UPLOAD_DIR = "uploads"
+# (local image storage writes here, see services/uploads.py)
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
 
 # Include routers
 app.include_router(event_router)
 app.include_router(auth_router)
+app.include_router(metrics_router)
+app.include_router(dashboard_router)
 
 @app.get("/")
 def root():
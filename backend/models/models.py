@@ -31,4 +31,4 @@ class Event(BaseModel):
     total_registered_volunteers: int
     created_at: str  # ISO format
     expireAt: str  # ISO format
-    registered_volunteers: Optional[List[str]] = []
+    processing_status: Optional[str] = None  # background pipeline progress after create
@@ -1,7 +1,5 @@
-from fastapi import APIRouter, Request, HTTPException, UploadFile, File, Form, Depends, Response, status
+from fastapi import APIRouter, Request, HTTPException, UploadFile, File, Form, Depends, Query, Response, status
 from pydantic import BaseModel, Field, validator
-from passlib.context import CryptContext
-from pymongo import MongoClient
 import os
 from dotenv import load_dotenv
 from authlib.integrations.starlette_client import OAuth
@@ -12,10 +10,19 @@ import logging
 import secrets
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
-import cloudinary
-import cloudinary.uploader
 from fastapi.security import OAuth2PasswordBearer
 from bson import ObjectId
+from database.database import (
+    volunteers_collection,
+    organizations_collection,
+    refresh_tokens_collection,
+)
+from services.cache import TTLCache
+from services.event_loader import load_events
+from services.hashing import password_hasher
+from services.leaderboard import leaderboard
+from services.stats import get_dashboard_stats, record_user_created, record_user_deleted
+from services.uploads import InvalidImageError, image_store
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,63 +32,69 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 # Create router
 router = APIRouter()
 
-# Password hashing
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
-
 # Load environment variables
 load_dotenv()
 
 CLIENT_ID = os.getenv('CLIENT_ID')
 CLIENT_SECRET = os.getenv('CLIENT_SECRET')
 
-# MongoDB setup
-client = MongoClient(os.getenv('MONGO_URI'))
-db = client[os.getenv('DB_NAME')]
-events_collection = db[os.getenv('EVENTS_COLLECTION')]
-volunteers_collection = db[os.getenv('VOLUNTEERS_COLLECTION')]
-organizations_collection = db[os.getenv('ORGANIZATIONS_COLLECTION')]
-refresh_tokens_collection = db[os.getenv('REFRESH_TOKENS_COLLECTION')]
-
 # JWT Config
 JWT_SECRET = os.getenv("JWT_SECRET", "your_secret_key")
 JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
-# Load Cloudinary credentials
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET")
-)
+# Whether a token's user still exists is cached per worker for this long.
+# Deleting an account revokes it immediately here and within the TTL elsewhere.
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", 60))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 10000))
 
 VALID_CAUSES = {"Environmental", "Community Service", "Education", "Healthcare", "Animal Welfare", "Disaster Relief", "Lifestyle & Culture", "Fundraising & Charity"}
 
 # Refresh token storage (use DB in production)
 refresh_tokens_store = {}
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+USER_COLLECTIONS = {
+    "volunteer": volunteers_collection,
+    "organization": organizations_collection,
+}
+
+# user_id -> whether the account exists (False once deleted)
+user_status_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+
+def revoke_user(user_id: str):
+    """Rejects the user's outstanding access tokens in this worker straight away"""
+    user_status_cache.set(user_id, False)
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    """
+    Trusts the signed user_id and role claims. The only database check is
+    whether the account still exists, and that answer is cached.
+    """
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user_id = payload.get("user_id")
-        role = payload.get("role")
+    except JWTError:
+        raise HTTPException(status_code=403, detail="Could not validate credentials")
 
-        if user_id is None or role is None:
-            raise HTTPException(status_code=403, detail="Invalid credentials")
+    user_id = payload.get("user_id")
+    role = payload.get("role")
+    collection = USER_COLLECTIONS.get(role)
+    if user_id is None or collection is None or not ObjectId.is_valid(user_id):
+        raise HTTPException(status_code=403, detail="Invalid credentials")
 
-        user = volunteers_collection.find_one({"_id": ObjectId(user_id)}) or \
-            organizations_collection.find_one({"_id": ObjectId(user_id)})
+    exists = user_status_cache.get(user_id)
+    if exists is None:
+        exists = await collection.find_one({"_id": ObjectId(user_id)}, {"_id": 1}) is not None
+        user_status_cache.set(user_id, exists)
 
-        if user is None:
-            raise HTTPException(status_code=404, detail="User not found")
+    if not exists:
+        raise HTTPException(status_code=404, detail="User not found")
 
-        return {"user_id": str(user["_id"]), "role": role}
-    except JWTError:
-        raise HTTPException(status_code=403, detail="Could not validate credentials")
+    return {"user_id": user_id, "role": role}
 
 ### 🔹 Utility Functions
-def hash_password(password: str):
-    return pwd_context.hash(password)
+async def hash_password(password: str):
+    return await password_hasher.hash(password)
 
 def verify_passwords(password: str, password_confirmation: str):
     if password != password_confirmation:
@@ -99,8 +112,9 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
 def create_refresh_token():
     return secrets.token_hex(32)
 
-def get_user_by_email(email: str):
-    return volunteers_collection.find_one({"email": email}) or organizations_collection.find_one({"email": email})
+async def get_user_by_email(email: str):
+    return await volunteers_collection.find_one({"email": email}) or \
+        await organizations_collection.find_one({"email": email})
 
 ### 🔹 Pydantic Models
 # In the OrganizationRegister class, add a field for event IDs
@@ -140,11 +154,11 @@ class VolunteerRegister(BaseModel):
 async def register_volunteer(volunteer: VolunteerRegister):
     verify_passwords(volunteer.password, volunteer.password_confirmation)
 
-    existing_user = get_user_by_email(volunteer.email)
+    existing_user = await get_user_by_email(volunteer.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = hash_password(volunteer.password)
+    hashed_password = await hash_password(volunteer.password)
     confirmation_token = secrets.token_urlsafe(32)
 
     volunteer_data = {
@@ -154,10 +168,14 @@ async def register_volunteer(volunteer: VolunteerRegister):
         "password": hashed_password,
         "is_verified": False,
         "confirmation_token": confirmation_token,
-        "role": "volunteer"
+        "role": "volunteer",
+        "points": 0,
+        "events_attended": 0
     }
 
-    result = volunteers_collection.insert_one(volunteer_data)
+    result = await volunteers_collection.insert_one(volunteer_data)
+    await record_user_created("volunteer")
+    leaderboard.set(volunteer_data)
 
     # Generate access token
     access_token = create_access_token({"user_id": str(result.inserted_id), "role": "volunteer"})
@@ -203,21 +221,22 @@ async def register_organization(
     verify_passwords(password, password_confirmation)
 
     # Check if email is already registered
-    existing_user = get_user_by_email(email)
+    existing_user = await get_user_by_email(email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = hash_password(password)
+    hashed_password = await hash_password(password)
 
     try:
-        # Upload file to Cloudinary
-        logo_bytes = await logo.read()
-        cloudinary_upload = cloudinary.uploader.upload(logo_bytes, folder="organization_logos")
-        logo_url = cloudinary_upload["secure_url"]
+        logo_url = await image_store.receive_and_store(logo, "organization_logos")
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading logo: {str(e)}")
 
-    result = organizations_collection.insert_one({
+    result = await organizations_collection.insert_one({
         "logo": logo_url,
         "name": name,
         "website_url": website_url,
@@ -230,6 +249,7 @@ async def register_organization(
         "password": hashed_password,
         "role": "organization"  # Added role
     })
+    await record_user_created("organization")
 
     # Create access token
     access_token = create_access_token({"user_id": str(result.inserted_id), "role": "organization"})
@@ -267,16 +287,25 @@ def role_required(required_role: str):
 # Login
 @router.post('/auth/login')
 async def login(email: str = Form(...), password: str = Form(...), response: Response = None):
-    user = get_user_by_email(email)
+    user = await get_user_by_email(email)
     
-    if not user or not pwd_context.verify(password, user.get("password", "")):
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
+    valid, new_hash = await password_hasher.verify_and_update(password, user.get("password", ""))
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+
+    # Rehash with the current argon2 parameters if they have changed since the last login
+    if new_hash:
+        collection = volunteers_collection if user["role"] == "volunteer" else organizations_collection
+        await collection.update_one({"_id": user["_id"]}, {"$set": {"password": new_hash}})
+
     access_token = create_access_token({"user_id": str(user["_id"]), "role": user["role"]})
     refresh_token = create_refresh_token()
 
     # Store refresh token in MongoDB
-    refresh_tokens_collection.update_one(
+    await refresh_tokens_collection.update_one(
         {"user_id": str(user["_id"])},
         {"$set": {"refresh_token": refresh_token, "created_at": datetime.utcnow(), "role": user["role"]}},
         upsert=True
@@ -298,7 +327,7 @@ async def login(email: str = Form(...), password: str = Form(...), response: Res
 # Refresh Token Route
 @router.post('/auth/refresh_token')
 async def refresh_token(refresh_token: str = Depends(oauth2_scheme)):
-    user = db.refresh_tokens.find_one({"refresh_token": refresh_token})
+    user = await refresh_tokens_collection.find_one({"refresh_token": refresh_token})
     if not user:
         raise HTTPException(status_code=403, detail="Invalid refresh token")
 
@@ -317,7 +346,7 @@ async def organization_dashboard(user: dict = Depends(role_required("organizatio
 @router.post('/auth/logout')
 async def logout(response: Response, user: dict = Depends(get_current_user)):
     # Optionally, you can invalidate the refresh token in the database
-    db.refresh_tokens.delete_one({"user_id": user["user_id"]})
+    await refresh_tokens_collection.delete_one({"user_id": user["user_id"]})
     
     # Clear the refresh token cookie
     response.delete_cookie(key="refresh_token")
@@ -331,12 +360,15 @@ async def delete_volunteer(user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Permission denied. Only volunteers can delete their accounts.")
 
     # Delete the volunteer from the database
-    result = volunteers_collection.delete_one({"_id": ObjectId(user["user_id"])})
+    result = await volunteers_collection.delete_one({"_id": ObjectId(user["user_id"])})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Volunteer not found")
+    revoke_user(user["user_id"])
+    await record_user_deleted("volunteer")
+    leaderboard.remove(user["user_id"])
 
     # Optionally, delete the refresh token
-    db.refresh_tokens.delete_one({"user_id": user["user_id"]})
+    await refresh_tokens_collection.delete_one({"user_id": user["user_id"]})
 
     return {"message": "Volunteer account deleted successfully"}
 
@@ -347,35 +379,30 @@ async def delete_organization(user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Permission denied. Only organizations can delete their accounts.")
 
     # Delete the organization from the database
-    result = organizations_collection.delete_one({"_id": ObjectId(user["user_id"])})
+    result = await organizations_collection.delete_one({"_id": ObjectId(user["user_id"])})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Organization not found")
+    revoke_user(user["user_id"])
+    await record_user_deleted("organization")
 
     # Optionally, delete the refresh token
-    db.refresh_tokens.delete_one({"user_id": user["user_id"]})
+    await refresh_tokens_collection.delete_one({"user_id": user["user_id"]})
 
     return {"message": "Organization account deleted successfully"}
 
 @router.get('/auth/me')
 async def get_current_user_details(user: dict = Depends(get_current_user)):
     if user["role"] == "volunteer":
-        user_data = volunteers_collection.find_one({"_id": ObjectId(user["user_id"])})
+        user_data = await volunteers_collection.find_one({"_id": ObjectId(user["user_id"])})
         if not user_data:
             raise HTTPException(status_code=404, detail="User not found")
         
         # Get categories from registered events
         event_categories = []
         if user_data.get("registered_events"):
-            # Convert event IDs to integers (they might be stored as strings)
             try:
-                event_ids = [int(eid) if isinstance(eid, str) else eid 
-                for eid in user_data["registered_events"]]
-                
                 # Fetch categories for all registered events
-                events = events_collection.find(
-                    {"event_id": {"$in": event_ids}},
-                    {"category": 1}
-                )
+                events = await load_events(user_data["registered_events"], {"category": 1})
                 event_categories = [event["category"] for event in events if "category" in event]
             except Exception as e:
                 logging.error(f"Error fetching event categories: {e}")
@@ -393,7 +420,7 @@ async def get_current_user_details(user: dict = Depends(get_current_user)):
         }
     
     elif user["role"] == "organization":
-        user_data = organizations_collection.find_one({"_id": ObjectId(user["user_id"])})
+        user_data = await organizations_collection.find_one({"_id": ObjectId(user["user_id"])})
         if not user_data:
             raise HTTPException(status_code=404, detail="User not found")
         
@@ -421,9 +448,8 @@ async def get_current_user_details(user: dict = Depends(get_current_user)):
     
 @router.get("/auth/total-users")
 async def get_total_users():
-    total_volunteers = volunteers_collection.count_documents({})
-    total_organizations = organizations_collection.count_documents({})
-    total_users = total_volunteers + total_organizations
+    stats = await get_dashboard_stats()
+    total_users = stats["total_volunteers"] + stats["total_organizations"]
     return {"total_users": total_users}
 
 @router.put('/auth/volunteer/update')
@@ -439,7 +465,7 @@ async def update_volunteer_details(
         raise HTTPException(status_code=403, detail="Permission denied. Only volunteers can update their details.")
 
     # Get the volunteer document
-    volunteer = volunteers_collection.find_one({"_id": ObjectId(user["user_id"])})
+    volunteer = await volunteers_collection.find_one({"_id": ObjectId(user["user_id"])})
     if not volunteer:
         raise HTTPException(status_code=404, detail="Volunteer not found")
 
@@ -458,7 +484,7 @@ async def update_volunteer_details(
             )
         
         # Verify current password
-        if not pwd_context.verify(current_password, volunteer.get("password", "")):
+        if not await password_hasher.verify(current_password, volunteer.get("password", "")):
             raise HTTPException(
                 status_code=400,
                 detail="Current password is incorrect"
@@ -470,7 +496,7 @@ async def update_volunteer_details(
                 detail="New password and confirmation do not match"
             )
         
-        update_data["password"] = hash_password(new_password)
+        update_data["password"] = await hash_password(new_password)
 
     if not update_data:
         raise HTTPException(
@@ -478,7 +504,7 @@ async def update_volunteer_details(
             detail="No valid fields provided for update"
         )
 
-    result = volunteers_collection.update_one(
+    result = await volunteers_collection.update_one(
         {"_id": ObjectId(user["user_id"])},
         {"$set": update_data}
     )
@@ -487,7 +513,9 @@ async def update_volunteer_details(
         raise HTTPException(status_code=400, detail="No changes were made.")
 
     # Return updated user data
-    updated_user = volunteers_collection.find_one({"_id": ObjectId(user["user_id"])})
+    updated_user = await volunteers_collection.find_one({"_id": ObjectId(user["user_id"])})
+    # Names are shown on the leaderboard
+    leaderboard.set(updated_user)
     return {
         "message": "Volunteer details updated successfully",
         "user": {
@@ -520,7 +548,7 @@ async def update_organization_details(
 
     if password and password_confirmation:
         verify_passwords(password, password_confirmation)
-        hashed_password = hash_password(password)
+        hashed_password = await hash_password(password)
     else:
         hashed_password = None
 
@@ -542,31 +570,37 @@ async def update_organization_details(
     if logo:
         if not allowed_file(logo.filename):
             raise HTTPException(status_code=400, detail="Invalid file type. Only PNG, JPG, JPEG files are allowed.")
-        logo_bytes = await logo.read()
-        cloudinary_upload = cloudinary.uploader.upload(logo_bytes, folder="organization_logos")
-        update_data["logo"] = cloudinary_upload["secure_url"]
+        try:
+            update_data["logo"] = await image_store.receive_and_store(logo, "organization_logos")
+        except InvalidImageError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     if hashed_password:
         update_data["password"] = hashed_password
 
-    organizations_collection.update_one({"_id": ObjectId(user["user_id"])}, {"$set": update_data})
+    await organizations_collection.update_one({"_id": ObjectId(user["user_id"])}, {"$set": update_data})
 
     return {"message": "Organization details updated successfully"}
 
 @router.get("/volunteers/leaderboard")
-async def get_leaderboard(limit: int = 10):
+async def get_leaderboard(limit: int = Query(10, ge=1, le=100)):
     """
     Returns top volunteers by points
     """
-    top_volunteers = list(volunteers_collection.find(
-        {},
-        {"first_name": 1, "last_name": 1, "points": 1, "attended_events": 1}
-    ).sort("points", -1).limit(limit))
-    
-    return [
-        {
-            "name": f"{v['first_name']} {v['last_name']}",
-            "points": v.get("points", 0),
-            "events_attended": len(v.get("attended_events", []))
-        }
-        for v in top_volunteers
-    ]
\ No newline at end of file
+    return leaderboard.top(limit)
+
+@router.get("/volunteers/leaderboard/me")
+async def get_my_leaderboard_position(
+    radius: int = Query(2, ge=0, le=25),
+    user: dict = Depends(get_current_user)
+):
+    """Returns the current volunteer's rank and the volunteers ranked around them"""
+    if user["role"] != "volunteer":
+        raise HTTPException(status_code=403, detail="Volunteer access only")
+    rank = leaderboard.rank(user["user_id"])
+    if rank is None:
+        raise HTTPException(status_code=404, detail="Volunteer not found on the leaderboard")
+    return {
+        "rank": rank,
+        "total_volunteers": len(leaderboard),
+        "neighbors": leaderboard.around(user["user_id"], radius),
+    }
\ No newline at end of file
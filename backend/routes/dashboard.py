@@ -1,34 +1,40 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
 from typing import List
 from database.database import events_collection
 from models.models import Event
-from routes.events import event_serializer
+from services.event_pipeline import listed_events
+from services.serialization import EVENT_PROJECTION, events_json_response
+from services.response_cache import EVENTS_NAMESPACE, response_cache
+from services.stats import get_dashboard_stats
 from datetime import datetime
 
 router = APIRouter()
 
 @router.get("/dashboard/causes", response_model=List[dict])
-async def get_dashboard_causes():
+async def get_dashboard_causes(request: Request):
     """
-    Aggregates events data by category for the dashboard CausesChart.
+    Event counts by category for the dashboard CausesChart, read from the
+    pre-aggregated stats document.
     Returns a list of objects with 'name' (the cause/category) and 'value' (count).
     """
-    pipeline = [
-        {"$group": {"_id": "$category", "value": {"$sum": 1}}},
-        {"$project": {"name": "$_id", "value": 1, "_id": 0}}
-    ]
-    causes_data = list(events_collection.aggregate(pipeline))
-    return causes_data
+    async def produce():
+        stats = await get_dashboard_stats()
+        return JSONResponse(content=[{"name": name, "value": value} for name, value in stats["events_by_category"].items()])
+
+    return await response_cache.cached(request, [EVENTS_NAMESPACE], produce)
 
 @router.get("/dashboard/upcoming", response_model=List[Event])
-async def get_dashboard_upcoming_events():
+async def get_dashboard_upcoming_events(request: Request):
     """
     Returns upcoming events with a date greater than or equal to today's date.
     The date field is expected in 'YYYY-MM-DD' format.
     """
-    today_str = datetime.utcnow().strftime("%Y-%m-%d")
-    events = list(events_collection.find({
-        "date": {"$gte": today_str},
-        "event_id": {"$type": "int"}
-    }))
-    return [Event(**event_serializer(event)) for event in events]
+    async def produce():
+        today_str = datetime.utcnow().strftime("%Y-%m-%d")
+        events = await events_collection.find(listed_events({"date": {"$gte": today_str}}), EVENT_PROJECTION).to_list(None)
+        return events_json_response(events)
+
+    # Keyed by day too, so yesterday's events drop out at midnight
+    request_day = datetime.utcnow().strftime("%Y-%m-%d")
+    return await response_cache.cached(request, [EVENTS_NAMESPACE, f"day:{request_day}"], produce)
@@ -1,30 +1,81 @@
 import logging
-from fastapi import APIRouter, HTTPException, Query, Form, File, UploadFile, Depends, Header, status
+from fastapi import APIRouter, HTTPException, Query, Form, File, UploadFile, Depends, Header, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from typing import List, Optional
-from database.database import events_collection
+from database.database import events_collection, organizations_collection, volunteers_collection, registrations_collection
 from models.models import Event
 from models.update_models import EventUpdate
-from services.geocoding import get_coordinates
+from services.geocoding import geo_point, nearby_pipeline
 import datetime
 import os
 import uuid as uuid_lib  
-import cloudinary
-import cloudinary.uploader
 from routes.auth import get_current_user
-from routes.auth import organizations_collection, volunteers_collection
 from bson import ObjectId
-from services.email_handler import EmailService
+from services.event_pipeline import (
+    PROCESS_EVENT_JOB,
+    PROCESS_IMPORTED_EVENTS_JOB,
+    PROCESSING_FAILED,
+    PROCESSING_PENDING,
+    listed_events,
+)
+from services.event_import import (
+    IMPORT_FIELDS,
+    MAX_IMPORT_BYTES,
+    MAX_IMPORT_ROWS,
+    RowError,
+    build_event,
+    csv_line,
+    event_to_csv_row,
+    parse_rows,
+)
+from services.id_allocator import event_id_allocator
+from services.jobs import job_queue
+from services.uploads import InvalidImageError, image_store
+from services.attendance import record_attendance
+from services.idempotency import run_idempotent
+from services.versioning import (
+    get_events_version,
+    make_etag,
+    mark_events_changed,
+    not_modified,
+    validator_headers,
+    versioned,
+)
+from services.stats import (
+    get_dashboard_stats,
+    record_event_created,
+    record_event_deleted,
+    record_events_created,
+    record_event_recategorized,
+)
+from services.pagination import (
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    decode_cursor,
+    encode_cursor,
+    keyset_filter,
+    parse_fields,
+)
+from services.response_cache import EVENTS_NAMESPACE, event_namespace, response_cache
+from services.serialization import (
+    EVENT_PROJECTION,
+    event_to_json,
+    events_json_response,
+    events_to_json,
+)
+from services.event_loader import MAX_BATCH_SIZE, load_events
+from services.search import (
+    AUTOCOMPLETE_LIMIT,
+    contains_filter,
+    normalize_text,
+    prefix_filter,
+    text_search_filter,
+)
 from pydantic import EmailStr
 from datetime import datetime as dt, timedelta, timezone
 import re
-from pymongo import MongoClient
-from dotenv import load_dotenv
-load_dotenv()
-
-client = MongoClient(os.getenv('MONGO_URI'))
-db = client[os.getenv('DB_NAME')]
-events_collection = db[os.getenv('EVENTS_COLLECTION')]
-organizations_collection = db[os.getenv('ORGANIZATIONS_COLLECTION')]
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 router = APIRouter()
 
@@ -32,81 +83,147 @@ router = APIRouter()
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-def get_current_organization(x_org_email: str = Header(None)):
+async def get_current_organization(x_org_email: str = Header(None)):
     if not x_org_email:
         raise HTTPException(status_code=401, detail="Missing authentication header")
 
-    orgs_collection = db[os.getenv('ORGANIZATIONS_COLLECTION', 'organizations')]
-    org = orgs_collection.find_one({"email": x_org_email})
+    org = await organizations_collection.find_one({"email": x_org_email})
 
     if not org:
         raise HTTPException(status_code=401, detail="Organization not found or not authorized")
     return org
 
-def event_serializer(event) -> dict:
-    """Serializes event data from MongoDB to API response format"""
+async def reserve_event_ids(count: int) -> list:
+    """Returns count new event_ids, usually from this worker's leased block"""
     try:
-        volunteer_requirements = str(event.get("volunteer_requirements", ""))
-        expire_at = event.get("expireAt")
-        if isinstance(expire_at, datetime.datetime):
-            expire_at = expire_at.isoformat()
-    except Exception:
-        volunteer_requirements = ""
-        expire_at = ""
-
-    return {
-        "event_id": event.get("event_id"),
-        "event_name": event.get("event_name"),
-        "organization": event.get("organization"),
-        "description": event.get("description"),
-        "category": event.get("category"),
-        "date": event.get("date"),
-        "time": event.get("time"),
-        "venue": event.get("venue"),
-        "city": event.get("city"),
-        "address": event.get("address"),
-        "latitude": event.get("latitude"),
-        "longitude": event.get("longitude"),
-        "duration": event.get("duration"),
-        "volunteer_requirements": volunteer_requirements,
-        "skills_required": event.get("skills_required", []),
-        "contact_email": event.get("contact_email"),
-        "contact_person": event.get("contact_person"),
-        "image_url": event.get("image_url"),
-        "registration_deadline": event.get("registration_deadline"),
-        "additional_notes": event.get("additional_notes", ""),
-        "status": event.get("status"),
-        "total_registered_volunteers": event.get("total_registered_volunteers", 0),
-        "created_at": event.get("created_at"),
-        "expireAt": expire_at
-    }
-
-def get_next_event_id() -> int:
-    """Returns the next sequential event_id using atomic operation"""
-    try:
-        # Initialize counter if it doesn't exist
-        counter = events_collection.find_one({"_id": "event_counter"})
-        if not counter:
-            # Find the highest existing event_id to initialize the counter
-            highest_event = events_collection.find_one(
-                {"event_id": {"$exists": True}},
-                sort=[("event_id", -1)]
-            )
-            initial_count = highest_event["event_id"] + 1 if highest_event else 1
-            events_collection.insert_one({"_id": "event_counter", "count": initial_count})
-            return initial_count
-
-        result = events_collection.find_one_and_update(
-            {"_id": "event_counter"},
-            {"$inc": {"count": 1}},
-            upsert=False,
-            return_document=True
-        )
-        return result["count"]
+        return await event_id_allocator.allocate(count)
     except Exception as e:
         logging.error(f"Error generating event ID: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate event ID")
 
+async def get_next_event_id() -> int:
+    """Returns the next event_id"""
+    return (await reserve_event_ids(1))[0]
+
+# Fields an event update may not set; join/leave, the pipeline and versioned() own them
+SERVER_MAINTAINED_EVENT_FIELDS = ("total_registered_volunteers", "processing_status", "version")
+
+# Largest radius accepted by /events/nearby
+MAX_NEARBY_RADIUS_KM = 500
+
+# List endpoints page through events ordered by (date, event_id)
+EVENT_SORT_KEYS = ["date", "event_id"]
+
+async def list_events_response(
+    query: dict,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    ranked: bool = False
+) -> Response:
+    """
+    Runs an event list query with optional keyset pagination and field projection.
+    Without limit/after every match is returned, as before. The cursor for the
+    next page is sent in the X-Next-Cursor header so the body stays a plain list.
+    ranked=True orders a $text query by relevance; its cursor carries an offset
+    since relevance scores cannot be used as a range filter.
+    """
+    field_list = parse_fields(fields, set(Event.model_fields), EVENT_SORT_KEYS)
+    projection = {field: 1 for field in field_list} if field_list else EVENT_PROJECTION
+    if ranked:
+        projection = {**projection, "score": {"$meta": "textScore"}}
+
+    paginate = limit is not None or after is not None
+    page_size = limit or MAX_PAGE_SIZE
+    offset = 0
+    if ranked:
+        if after:
+            offset = decode_cursor(after).get("offset", 0)
+        cursor = events_collection.find(query, projection) \
+            .sort([("score", {"$meta": "textScore"}), ("event_id", 1)])
+        if paginate:
+            cursor = cursor.skip(offset).limit(page_size + 1)
+    elif paginate:
+        resume = keyset_filter(EVENT_SORT_KEYS, after)
+        if resume:
+            query = {"$and": [query, resume]}
+        cursor = events_collection.find(query, projection) \
+            .sort([(key, 1) for key in EVENT_SORT_KEYS]) \
+            .limit(page_size + 1)
+    else:
+        cursor = events_collection.find(query, projection)
+    events = await cursor.to_list(None)
+
+    headers = {}
+    if paginate and len(events) > page_size:
+        events = events[:page_size]
+        last = events[-1]
+        if ranked:
+            headers[NEXT_CURSOR_HEADER] = encode_cursor({"offset": offset + page_size})
+        else:
+            headers[NEXT_CURSOR_HEADER] = encode_cursor({key: last.get(key) for key in EVENT_SORT_KEYS})
+
+    return events_json_response(events, headers=headers, fields=field_list)
+
+# Documents pulled from Mongo per round trip while streaming
+STREAM_BATCH_SIZE = 500
+
+def stream_events_response(query: dict, format: str = "ndjson", fields: Optional[str] = None) -> StreamingResponse:
+    """
+    Streams every matching event as NDJSON (one event per line) or as a chunked
+    JSON array. Events are serialized one at a time straight off the cursor,
+    so memory stays flat regardless of how many events match.
+    """
+    field_list = parse_fields(fields, set(Event.model_fields), ["event_id"])
+    projection = {field: 1 for field in field_list} if field_list else EVENT_PROJECTION
+
+    def encode(event) -> str:
+        if field_list:
+            return events_to_json([event], field_list)[1:-1].decode()
+        return event_to_json(event).decode()
+
+    async def generate():
+        cursor = events_collection.find(query, projection).batch_size(STREAM_BATCH_SIZE)
+        first = True
+        if format == "json":
+            yield "["
+        try:
+            async for event in cursor:
+                if format == "json":
+                    yield encode(event) if first else "," + encode(event)
+                else:
+                    yield encode(event) + "\n"
+                first = False
+        except Exception as e:
+            # Headers are already sent; re-raising aborts the connection, so the
+            # client sees a truncated body instead of a well-formed partial list
+            logging.error(f"Error streaming events: {e}")
+            raise
+        finally:
+            await cursor.close()
+        if format == "json":
+            yield "]"
+
+    media_type = "application/json" if format == "json" else "application/x-ndjson"
+    return StreamingResponse(generate(), media_type=media_type)
+
+def stream_events_csv_response(query: dict) -> StreamingResponse:
+    """Streams matching events as CSV in the POST /events/import column layout"""
+    async def generate():
+        cursor = events_collection.find(query, EVENT_PROJECTION).sort("event_id", 1).batch_size(STREAM_BATCH_SIZE)
+        yield csv_line(["event_id"] + IMPORT_FIELDS)
+        try:
+            async for event in cursor:
+                yield csv_line(event_to_csv_row(event))
+        except Exception as e:
+            # Re-raised so the export is cut off rather than ending like a complete file
+            logging.error(f"Error streaming events: {e}")
+            raise
+        finally:
+            await cursor.close()
+
+    return StreamingResponse(generate(), media_type="text/csv")
+
 # ------------------------------
 # Event Endpoints
 # ------------------------------
@@ -115,31 +232,201 @@ def get_next_event_id() -> int:
 async def get_total_events():
     """Returns total count of events"""
     try:
-        return {"total_events": events_collection.count_documents({})}
+        stats = await get_dashboard_stats()
+        return {"total_events": stats["total_events"]}
     except Exception as e:
         logging.error(f"Error counting events: {e}")
         raise HTTPException(status_code=500, detail="Failed to count events")
 
 @router.get("/events", response_model=List[Event])
-async def get_events():
-    """Returns all events"""
+async def get_events(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None)
+):
+    """Returns all events, optionally paginated (limit/after) and projected (fields)"""
     try:
-        events = list(events_collection.find({"event_id": {"$type": "int"}}))
-        return [Event(**event_serializer(event)) for event in events]
+        # The ETag only needs the collection version, so a 304 costs one tiny read
+        version, updated_at = await get_events_version()
+        etag = make_etag("events", version, request.url.query)
+        unchanged = not_modified(request, etag, updated_at)
+        if unchanged:
+            return unchanged
+
+        response = await response_cache.cached(
+            request, [EVENTS_NAMESPACE],
+            lambda: list_events_response(listed_events({}), limit, after, fields),
+            version=version
+        )
+        response.headers.update(validator_headers(etag, updated_at))
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error fetching events: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch events")
 
+@router.get("/events/stream")
+async def stream_events(
+    format: str = Query("ndjson", pattern="^(ndjson|json)$"),
+    fields: Optional[str] = Query(None)
+):
+    """Streams all events as NDJSON or a chunked JSON array (for exports and the map view)"""
+    return stream_events_response(listed_events({}), format, fields)
+
+def build_event_filter_query(
+    category: Optional[str] = None,
+    organization: Optional[str] = None,
+    skills: Optional[str] = None,
+    search: Optional[str] = None,
+    date: Optional[str] = None,
+    status: Optional[str] = None,
+    city: Optional[str] = None,
+    upcoming: Optional[bool] = False
+) -> dict:
+    """Builds the Mongo query shared by /events/filter and /events/nearby, over listed events only"""
+    query = {}
+    
+    # Category filter
+    if category and category.strip():
+        categories = [c.strip() for c in category.split(",") if c.strip()]
+        if len(categories) == 1:
+            query["category"] = contains_filter(categories[0])
+        else:
+            query["category"] = {"$in": categories}
+    
+    # Organization filter
+    if organization and organization.strip():
+        query["organization"] = organization
+    
+    # Skills filter
+    if skills and skills.strip():
+        skill_list = [skill.strip() for skill in skills.split(",") if skill.strip()]
+        if skill_list:
+            query["skills_required"] = {"$in": skill_list}
+    
+    # Search filter (text index over name, description, skills and city)
+    if search and search.strip():
+        query["$text"] = text_search_filter(search)
+    
+    # Date filter
+    if date and date.strip():
+        query["date"] = date
+    
+    # Status filter
+    if status and status.strip():
+        query["status"] = contains_filter(status)
+    
+    # City filter
+    if city and city.strip():
+        query["city"] = contains_filter(city)
+    
+    # Upcoming events filter
+    if upcoming:
+        today = dt.now().strftime("%Y-%m-%d")
+        query["date"] = {"$gte": today}
+
+    return listed_events(query)
+
+@router.get("/events/nearby", response_model=List[Event])
+async def get_nearby_events(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(10, gt=0, le=MAX_NEARBY_RADIUS_KM),
+    category: Optional[str] = Query(None),
+    skills: Optional[str] = Query(None),
+    upcoming: Optional[bool] = Query(False),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    """
+    Returns events within radius_km of (lat, lon), nearest first.
+    Can be combined with the category, skills and upcoming filters.
+    """
+    query = build_event_filter_query(category=category, skills=skills, upcoming=upcoming)
+    pipeline = nearby_pipeline(lat, lon, radius_km, query, limit) + [{"$project": EVENT_PROJECTION}]
+    try:
+        cursor = await events_collection.aggregate(pipeline)
+        events = await cursor.to_list(None)
+        return events_json_response(events)
+    except Exception as e:
+        logging.error(f"Error fetching nearby events: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch nearby events")
+
+@router.get("/events/filter", response_model=List[Event])
+async def filter_events(
+    category: Optional[str] = Query(None),
+    organization: Optional[str] = Query(None),
+    skills: Optional[str] = Query(None),
+    search: Optional[str] = Query(None),
+    date: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    city: Optional[str] = Query(None),
+    upcoming: Optional[bool] = Query(False),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None)
+):
+    """
+    Filters events based on provided query parameters
+    """
+    query = build_event_filter_query(category, organization, skills, search, date, status, city, upcoming)
+    ranked = "$text" in query
+    return await list_events_response(query, limit, after, fields, ranked=ranked)
+
+@router.get("/events/clear", response_model=List[Event])
+async def clear_filters(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None)
+):
+    """Returns all events (clearing any applied filters)"""
+    return await list_events_response(listed_events({}), limit, after, fields)
+
+@router.get("/events/autocomplete", response_model=List[str])
+async def autocomplete_events(
+    search: str = Query(...),
+    limit: int = Query(AUTOCOMPLETE_LIMIT, ge=1, le=50)
+):
+    """Returns event names for autocomplete suggestions"""
+    if not normalize_text(search):
+        return []
+    # Served from the event_name_normalized index as a prefix range scan
+    events = await events_collection.find(
+        listed_events(prefix_filter("event_name_normalized", search)),
+        {"event_name": 1, "_id": 0}
+    ).sort("event_name_normalized", 1).limit(limit * 2).to_list(None)
+    suggestions = list(dict.fromkeys(event["event_name"] for event in events if event.get("event_name")))
+    return suggestions[:limit]
+
 @router.get("/events/{event_id}", response_model=Event)
-async def get_event(event_id: int):
+async def get_event(event_id: int, request: Request):
     """Returns a specific event by ID"""
-    try:
-        event = events_collection.find_one({
-            "$or": [{"event_id": event_id}, {"event_id": str(event_id)}]
-        })
+    event_filter = {"$or": [{"event_id": event_id}, {"event_id": str(event_id)}]}
+
+    async def produce():
+        event = await events_collection.find_one(event_filter, EVENT_PROJECTION)
         if not event:
             raise HTTPException(status_code=404, detail="Event not found")
-        return Event(**event_serializer(event))
+        return Response(content=event_to_json(event), media_type="application/json")
+
+    try:
+        # Read just the version first so a revalidation never loads or serializes the event
+        meta = await events_collection.find_one(event_filter, {"version": 1, "updated_at": 1})
+        if not meta:
+            raise HTTPException(status_code=404, detail="Event not found")
+        etag = make_etag("event", event_id, meta.get("version", 0))
+        unchanged = not_modified(request, etag, meta.get("updated_at"))
+        if unchanged:
+            return unchanged
+
+        response = await response_cache.cached(
+            request, [event_namespace(event_id)], produce, version=meta.get("version", 0)
+        )
+        response.headers.update(validator_headers(etag, meta.get("updated_at")))
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error fetching event {event_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch event")
@@ -224,31 +511,19 @@ async def create_event(
             raise HTTPException(status_code=400, detail="Invalid image extension")
 
         # Process data
-        event_id = get_next_event_id()
+        event_id = await get_next_event_id()
         skills_list = [skill.strip() for skill in skills_required.split(",") if skill.strip()]
         max_capacity = int(volunteer_requirements) if volunteer_requirements else 0
 
-        # Get coordinates
-        latitude, longitude = get_coordinates(address)
-        if latitude is None or longitude is None:
-            raise HTTPException(status_code=400, detail="Invalid address")
-
-        # Upload image
+        # Geocoding and the image upload run in the background pipeline,
+        # but the upload has to be spooled before the request body is gone
+        image = await image_store.receive(image_url)
         try:
-            cloudinary.config(
-                cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-                api_key=os.getenv("CLOUDINARY_API_KEY"),
-                api_secret=os.getenv("CLOUDINARY_API_SECRET")
-            )
-            public_id = f"{event_id}_{os.path.splitext(image_url.filename)[0]}"
-            upload_result = cloudinary.uploader.upload(
-                await image_url.read(),
-                public_id=public_id,
-                resource_type="image"
-            )
-            image_url_path = upload_result.get("secure_url")
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Image upload failed: {e}")
+            # Only the header is checked here; decoding and resizing stay in the pipeline
+            await image_store.verify(image)
+        except InvalidImageError as e:
+            image.close()
+            raise HTTPException(status_code=400, detail=str(e))
 
         # Set status and expiration
         deadline_date = dt.strptime(registration_deadline, "%Y-%m-%d").date()
@@ -264,6 +539,7 @@ async def create_event(
         event_data = {
             "event_id": event_id,
             "event_name": event_name,
+            "event_name_normalized": normalize_text(event_name),
             "organization": current_org["name"],
             "description": description,
             "category": category,
@@ -272,8 +548,8 @@ async def create_event(
             "venue": venue,
             "city": city,
             "address": address,
-            "latitude": latitude,
-            "longitude": longitude,
+            "latitude": None,
+            "longitude": None,
             "duration": duration,
             "volunteer_requirements": max_capacity,
             "skills_required": skills_list,
@@ -282,54 +558,134 @@ async def create_event(
                 "name": contact_person_name,
                 "contact_number": contact_person_number
             },
-            "image_url": image_url_path,
+            "image_url": "",
             "registration_deadline": registration_deadline,
             "additional_notes": additional_notes,
             "status": status,
             "total_registered_volunteers": 0,
             "created_at": dt.now(timezone.utc).isoformat(),
             "expireAt": expireAt,
-            "registered_volunteers": []
+            "processing_status": PROCESSING_PENDING,
+            "version": 1,
+            "updated_at": dt.now(timezone.utc)
         }
 
-        events_collection.insert_one(event_data)
+        try:
+            await events_collection.insert_one(event_data)
+        except BaseException:
+            image.close()
+            raise
+        await record_event_created(category)
+        await mark_events_changed()
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-    # Send QR code email to organization
+    # Geocode, upload the image and email the QR code off the request path
+    processing_status = PROCESSING_PENDING
     try:
-        email_service = EmailService()
-        email_service.send_event_qr_to_organization(
-            event_id=event_id,
-            event_name=event_name,
-            organization_email=current_org["email"],
-            event_details=event_data
-        )   
+        await job_queue.enqueue(PROCESS_EVENT_JOB, {
+            "event_id": event_id,
+            "image": image,
+            "organization_email": current_org["email"]
+        })
     except Exception as e:
-        logging.error(f"Failed to send QR code email to organization: {e}")
-
-    return {"message": "Event created successfully", "event_id": event_id}
+        logging.error(f"Failed to queue processing for event {event_id}: {e}")
+        image.close()
+        processing_status = PROCESSING_FAILED
+        await events_collection.update_one(
+            {"event_id": event_id},
+            versioned({"$set": {"processing_status": PROCESSING_FAILED, "processing_error": str(e)}})
+        )
+        await mark_events_changed(event_id)
 
+    return {
+        "message": "Event created successfully",
+        "event_id": event_id,
+        "processing_status": processing_status
+    }
 
-@router.get("/events", response_model=List[Event])
-async def get_events():
+@router.post("/events/import")
+async def import_events(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    user: dict = Depends(get_current_user)
+):
     """
-    Fetches all events from the database with a numeric event_id.
-    Returns events serialized according to the Event model.
+    Creates events in bulk for the current organization from a CSV or NDJSON
+    file with the same fields as POST /events (image_url is an optional URL).
+    Valid rows are imported, and every invalid row is reported with its line
+    number and the reason.
     """
-    events = list(events_collection.find({"event_id": {"$type": "int"}}))
-    return [Event(**event_serializer(event)) for event in events]
+    if user["role"] != "organization":
+        raise HTTPException(status_code=403, detail="Organization access only")
+    current_org = await organizations_collection.find_one({"_id": ObjectId(user["user_id"])}, {"name": 1, "email": 1})
+    if not current_org:
+        raise HTTPException(status_code=404, detail="Organization not found")
+
+    if format is None:
+        format = "csv" if (file.filename or "").lower().endswith(".csv") or file.content_type == "text/csv" else "ndjson"
+
+    content = await file.read(MAX_IMPORT_BYTES + 1)
+    if len(content) > MAX_IMPORT_BYTES:
+        raise HTTPException(status_code=413, detail=f"Import files are limited to {MAX_IMPORT_BYTES} bytes")
+    try:
+        rows = parse_rows(content, format)
+    except RowError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_IMPORT_ROWS} events per import")
+
+    errors, valid = [], []
+    for line, row in rows:
+        try:
+            if isinstance(row, RowError):
+                raise row
+            valid.append((line, build_event(row, current_org["name"])))
+        except RowError as e:
+            errors.append({"line": line, "error": str(e)})
+
+    imported = []
+    if valid:
+        for event_id, (_, event) in zip(await reserve_event_ids(len(valid)), valid):
+            event["event_id"] = event_id
+        try:
+            await events_collection.insert_many([event for _, event in valid], ordered=False)
+            imported = valid
+        except BulkWriteError as e:
+            failed = {error["index"]: error.get("errmsg", "Write failed") for error in e.details.get("writeErrors", [])}
+            imported = [entry for index, entry in enumerate(valid) if index not in failed]
+            errors += [{"line": valid[index][0], "error": message} for index, message in failed.items()]
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    event_ids = [event["event_id"] for _, event in imported]
+    if imported:
+        await record_events_created([event["category"] for _, event in imported])
+        await mark_events_changed()
+        # Geocode each distinct address once and email the QR codes off the request path
+        try:
+            await job_queue.enqueue(PROCESS_IMPORTED_EVENTS_JOB, {
+                "event_ids": event_ids,
+                "organization_email": current_org["email"]
+            })
+        except Exception as e:
+            logging.error(f"Failed to queue processing for imported events: {e}")
+            await events_collection.update_many(
+                {"event_id": {"$in": event_ids}},
+                versioned({"$set": {"processing_status": PROCESSING_FAILED, "processing_error": str(e)}})
+            )
+            await mark_events_changed(*event_ids)
+
+    return {
+        "imported": len(imported),
+        "failed": len(errors),
+        "event_ids": event_ids,
+        "errors": sorted(errors, key=lambda error: error["line"]),
+    }
 
-@router.get("/events/{event_id}", response_model=Event)
-async def get_event(event_id: int):
-    """Fetches a single event by its event_id"""
-    event = events_collection.find_one({
-        "$or": [{"event_id": event_id}, {"event_id": str(event_id)}]
-    })
-    if event:
-        return Event(**event_serializer(event))
-    raise HTTPException(status_code=404, detail="Event not found")
 
 @router.put("/events/{event_id}", response_model=dict)
 async def update_event(
@@ -339,7 +695,7 @@ async def update_event(
 ):
     """Updates an existing event with the provided data"""
     # Verify event exists and organization owns it
-    event = events_collection.find_one({"event_id": event_id})
+    event = await events_collection.find_one({"event_id": event_id})
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     if event["organization"] != current_org["name"]:
@@ -347,6 +703,20 @@ async def update_event(
     
     # Prepare update data
     update_data = updated_event.dict(exclude_unset=True)
+    # Maintained by join/leave and the processing pipeline, never by the organization
+    for field in SERVER_MAINTAINED_EVENT_FIELDS:
+        update_data.pop(field, None)
+
+    # Stored as an int (0 = unlimited), like on create, so join can compare it with the head count
+    if "volunteer_requirements" in update_data:
+        try:
+            update_data["volunteer_requirements"] = int(update_data["volunteer_requirements"] or 0)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="volunteer_requirements must be a number")
+
+    # Keep the autocomplete prefix field in step with the name
+    if update_data.get("event_name"):
+        update_data["event_name_normalized"] = normalize_text(update_data["event_name"])
     
     # Convert date fields if provided
     if "date" in update_data and isinstance(update_data["date"], datetime.date):
@@ -364,14 +734,24 @@ async def update_event(
         current_date = dt.now(timezone.utc).date()
         update_data["status"] = "Open" if deadline_date >= current_date else "Closed"
     
+    # Keep the GeoJSON location in step with the coordinates
+    if "latitude" in update_data or "longitude" in update_data:
+        latitude = update_data.get("latitude", event.get("latitude"))
+        longitude = update_data.get("longitude", event.get("longitude"))
+        if latitude is not None and longitude is not None:
+            update_data["location"] = geo_point(latitude, longitude)
+
     # Perform the update
-    result = events_collection.update_one(
+    result = await events_collection.update_one(
         {"event_id": event_id},
-        {"$set": update_data}
+        versioned({"$set": update_data})
     )
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Event not found")
+    if "category" in update_data:
+        await record_event_recategorized(event.get("category"), update_data["category"])
+    await mark_events_changed(event_id)
     
     return {"message": "Event updated successfully"}
 
@@ -381,133 +761,89 @@ async def delete_event(
     current_org: dict = Depends(get_current_organization)
 ):
     """Deletes an event if the requesting organization owns it"""
-    event = events_collection.find_one({"event_id": event_id})
+    event = await events_collection.find_one({"event_id": event_id})
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     if event["organization"] != current_org["name"]:
         raise HTTPException(status_code=403, detail="Permission denied. You cannot delete this event.")
     
     # Remove from organization's created_events list
-    organizations_collection.update_one(
+    await organizations_collection.update_one(
         {"_id": ObjectId(current_org["_id"])},
         {"$pull": {"created_events": str(event_id)}}
     )
     
     # Delete the event
-    result = events_collection.delete_one({"event_id": event_id})
+    result = await events_collection.delete_one({"event_id": event_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Event not found")
+    await registrations_collection.delete_many({"event_id": event_id})
+    await record_event_deleted(event.get("category"))
+    await mark_events_changed(event_id)
     
     return {"message": "Event deleted successfully"}
 
-@router.get("/events/filter", response_model=List[Event])
-async def filter_events(
-    category: Optional[str] = Query(None),
-    organization: Optional[str] = Query(None),
-    skills: Optional[str] = Query(None),
-    search: Optional[str] = Query(None),
-    date: Optional[str] = Query(None),
-    status: Optional[str] = Query(None),
-    city: Optional[str] = Query(None),
-    upcoming: Optional[bool] = Query(False)
-):
-    """
-    Filters events based on provided query parameters
-    """
-    query = {"event_id": {"$type": "int"}}
-    
-    # Category filter
-    if category and category.strip():
-        categories = [c.strip() for c in category.split(",") if c.strip()]
-        if len(categories) == 1:
-            query["category"] = {"$regex": categories[0], "$options": "i"}
-        else:
-            query["category"] = {"$in": categories}
-    
-    # Organization filter
-    if organization and organization.strip():
-        query["organization"] = organization
-    
-    # Skills filter
-    if skills and skills.strip():
-        skill_list = [skill.strip() for skill in skills.split(",") if skill.strip()]
-        if skill_list:
-            query["skills_required"] = {"$in": skill_list}
-    
-    # Search filter
-    if search and search.strip():
-        query["event_name"] = {"$regex": search, "$options": "i"}
-    
-    # Date filter
-    if date and date.strip():
-        query["date"] = date
-    
-    # Status filter
-    if status and status.strip():
-        query["status"] = {"$regex": status, "$options": "i"}
-    
-    # City filter
-    if city and city.strip():
-        query["city"] = {"$regex": city, "$options": "i"}
-    
-    # Upcoming events filter
-    if upcoming:
-        today = dt.now().strftime("%Y-%m-%d")
-        query["date"] = {"$gte": today}
-    
-    events = list(events_collection.find(query))
-    return [Event(**event_serializer(event)) for event in events]
-
-@router.get("/events/clear", response_model=List[Event])
-async def clear_filters():
-    """Returns all events (clearing any applied filters)"""
-    events = list(events_collection.find({"event_id": {"$type": "int"}}))
-    return [Event(**event_serializer(event)) for event in events]
-
-@router.get("/events/autocomplete", response_model=List[str])
-async def autocomplete_events(search: str = Query(...)):
-    """Returns event names for autocomplete suggestions"""
-    query = {"event_name": {"$regex": f"^{search}", "$options": "i"}}
-    suggestions = events_collection.distinct("event_name", query)
-    return suggestions
-
-@router.get("/events/total-events")
-async def get_total_events():
-    """
-    Fetches the total number of events stored in the database.
-    """
-    total_events = events_collection.count_documents({})
-    return {"total_events": total_events}
+# Matches an event with a free place: volunteer_requirements of 0 (or missing) means unlimited
+HAS_CAPACITY = {"$expr": {"$let": {
+    "vars": {"capacity": {"$convert": {"input": "$volunteer_requirements", "to": "int", "onError": 0, "onNull": 0}}},
+    "in": {"$or": [
+        {"$lte": ["$$capacity", 0]},
+        {"$lt": [{"$ifNull": ["$total_registered_volunteers", 0]}, "$$capacity"]},
+    ]},
+}}}
 
 @router.post("/events/{event_id}/join")
 async def join_event(
     event_id: int,
     user: dict = Depends(get_current_user),
 ):
+    """
+    Registers the volunteer. The unique (event_id, volunteer_id) index rejects
+    double joins, and the place is taken with a conditional $inc that only
+    matches while the event has room, so concurrent joins cannot overbook.
+    """
     if user["role"] != "volunteer":
         raise HTTPException(status_code=403, detail="Only volunteers can join events.")
 
-    event = events_collection.find_one({"event_id": event_id})
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
-
-    # Check if the volunteer is already registered
-    if "registered_volunteers" in event and str(user["user_id"]) in event["registered_volunteers"]:
+    volunteer_id = str(user["user_id"])
+    registration = {"event_id": event_id, "volunteer_id": volunteer_id}
+    try:
+        await registrations_collection.insert_one({**registration, "registered_at": dt.now(timezone.utc)})
+    except DuplicateKeyError:
         raise HTTPException(status_code=400, detail="You are already registered for this event.")
 
-    # Add the volunteer to the event
-    events_collection.update_one(
-        {"event_id": event_id},
-        {"$push": {"registered_volunteers": str(user["user_id"])},
-        "$inc": {"total_registered_volunteers": 1}}
-    )
+    place_taken = False
+    try:
+        result = await events_collection.update_one(
+            {"event_id": event_id, **HAS_CAPACITY},
+            versioned({"$inc": {"total_registered_volunteers": 1}})
+        )
+        if result.modified_count == 0:
+            if not await events_collection.count_documents({"event_id": event_id}, limit=1):
+                raise HTTPException(status_code=404, detail="Event not found")
+            raise HTTPException(status_code=409, detail="This event is already full.")
+        place_taken = True
 
-    # Update the volunteer's registered_events list
-    volunteers_collection.update_one(
-        {"_id": ObjectId(user["user_id"])},
-        {"$push": {"registered_events": str(event_id)}}
-    )
+        # Update the volunteer's registered_events list
+        await volunteers_collection.update_one(
+            {"_id": ObjectId(user["user_id"])},
+            {"$addToSet": {"registered_events": str(event_id)}}
+        )
+    except Exception as e:
+        # Undo the registration (and the place, if it was taken) so nothing is left half done
+        await registrations_collection.delete_one(registration)
+        if place_taken:
+            await events_collection.update_one(
+                {"event_id": event_id, "total_registered_volunteers": {"$gt": 0}},
+                versioned({"$inc": {"total_registered_volunteers": -1}})
+            )
+        if isinstance(e, HTTPException):
+            raise
+        logging.error(f"Error joining event {event_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to join event")
 
+    # total_registered_volunteers changed
+    await mark_events_changed(event_id)
     return {"message": "Successfully registered for the event!"}
 
 @router.post("/events/{event_id}/leave", response_model=dict)
@@ -519,48 +855,135 @@ async def leave_event(
     if user["role"] != "volunteer":
         raise HTTPException(status_code=403, detail="Only volunteers can leave events.")
 
-    event = events_collection.find_one({"event_id": event_id})
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
-
-    # Check if volunteer is registered
-    if "registered_volunteers" not in event or str(user["user_id"]) not in event["registered_volunteers"]:
+    # Deleting the registration is the atomic step; only the request that removed it frees the place
+    result = await registrations_collection.delete_one({"event_id": event_id, "volunteer_id": str(user["user_id"])})
+    if result.deleted_count == 0:
+        if not await events_collection.count_documents({"event_id": event_id}, limit=1):
+            raise HTTPException(status_code=404, detail="Event not found")
         raise HTTPException(status_code=400, detail="You are not registered for this event.")
 
-    # Update event to remove volunteer
-    events_collection.update_one(
-        {"event_id": event_id},
-        {
-            "$pull": {"registered_volunteers": str(user["user_id"])},
-            "$inc": {"total_registered_volunteers": -1}
-        }
+    await events_collection.update_one(
+        {"event_id": event_id, "total_registered_volunteers": {"$gt": 0}},
+        versioned({"$inc": {"total_registered_volunteers": -1}})
     )
+    await mark_events_changed(event_id)
 
     # Update volunteer's registered events
-    volunteers_collection.update_one(
+    await volunteers_collection.update_one(
         {"_id": ObjectId(user["user_id"])},
         {"$pull": {"registered_events": str(event_id)}}
     )
 
     return {"message": "Successfully left the event."}
 
+# Attendee pages are ordered by sign-up time
+ATTENDEE_SORT_KEYS = ["registered_at", "volunteer_id"]
+
+@router.get("/events/{event_id}/attendees", response_model=List[dict])
+async def get_event_attendees(
+    event_id: int,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None),
+    user: dict = Depends(get_current_user)
+):
+    """
+    Returns one page of an event's registered volunteers, oldest sign-up first,
+    to the organization that owns the event.
+    The cursor for the next page is sent in the X-Next-Cursor header.
+    """
+    if user["role"] != "organization":
+        raise HTTPException(status_code=403, detail="Organization access only")
+    org = await organizations_collection.find_one({"_id": ObjectId(user["user_id"])}, {"name": 1})
+    if not org:
+        raise HTTPException(status_code=404, detail="Organization not found")
+
+    event = await events_collection.find_one({"event_id": event_id}, {"organization": 1})
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if event["organization"] != org["name"]:
+        raise HTTPException(status_code=403, detail="Permission denied. You cannot view this event's attendees.")
+
+    query = {"event_id": event_id}
+    resume = keyset_filter(ATTENDEE_SORT_KEYS, after)
+    if resume:
+        query = {"$and": [query, resume]}
+    registrations = await registrations_collection.find(query) \
+        .sort([(key, 1) for key in ATTENDEE_SORT_KEYS]) \
+        .limit(limit + 1) \
+        .to_list(None)
+
+    headers = {}
+    if len(registrations) > limit:
+        registrations = registrations[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor({key: registrations[-1][key] for key in ATTENDEE_SORT_KEYS})
+
+    volunteer_ids = [ObjectId(r["volunteer_id"]) for r in registrations if ObjectId.is_valid(r["volunteer_id"])]
+    volunteers = await volunteers_collection.find(
+        {"_id": {"$in": volunteer_ids}},
+        {"first_name": 1, "last_name": 1, "email": 1}
+    ).to_list(None)
+    volunteers_by_id = {str(v["_id"]): v for v in volunteers}
+
+    content = []
+    for registration in registrations:
+        volunteer = volunteers_by_id.get(registration["volunteer_id"], {})
+        content.append({
+            "volunteer_id": registration["volunteer_id"],
+            "first_name": volunteer.get("first_name"),
+            "last_name": volunteer.get("last_name"),
+            "email": volunteer.get("email"),
+            "registered_at": registration["registered_at"],
+        })
+    return JSONResponse(content=jsonable_encoder(content), headers=headers)
+
 @router.get("/organization/events", response_model=List[Event])
-async def get_organization_events(user: dict = Depends(get_current_user)):
+async def get_organization_events(request: Request, user: dict = Depends(get_current_user)):
     """Returns events created by the current organization"""
     try:
         if user["role"] != "organization":
             raise HTTPException(status_code=403, detail="Organization access only")
 
-        org = organizations_collection.find_one({"_id": ObjectId(user["user_id"])})
+        version, updated_at = await get_events_version()
+        etag = make_etag("organization-events", user["user_id"], version)
+        unchanged = not_modified(request, etag, updated_at)
+        if unchanged:
+            return unchanged
+
+        org = await organizations_collection.find_one({"_id": ObjectId(user["user_id"])})
         if not org:
             raise HTTPException(status_code=404, detail="Organization not found")
 
-        events = list(events_collection.find({"organization": org["name"]}))
-        return [Event(**event_serializer(event)) for event in events]
+        events = await events_collection.find({"organization": org["name"]}, EVENT_PROJECTION).to_list(None)
+        return events_json_response(events, headers=validator_headers(etag, updated_at))
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error fetching org events: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch organization events")
 
+@router.get("/organization/events/export")
+async def export_organization_events(
+    format: str = Query("ndjson", pattern="^(ndjson|json|csv)$"),
+    user: dict = Depends(get_current_user)
+):
+    """
+    Streams the current organization's events as NDJSON, a JSON array or CSV.
+    CSV columns match POST /events/import, after a leading event_id.
+    """
+    if user["role"] != "organization":
+        raise HTTPException(status_code=403, detail="Organization access only")
+    org = await organizations_collection.find_one({"_id": ObjectId(user["user_id"])}, {"name": 1})
+    if not org:
+        raise HTTPException(status_code=404, detail="Organization not found")
+
+    query = {"organization": org["name"]}
+    if format == "csv":
+        response = stream_events_csv_response(query)
+    else:
+        response = stream_events_response(query, format)
+    response.headers["Content-Disposition"] = f'attachment; filename="events.{format}"'
+    return response
+
 @router.get("/volunteer/events", response_model=List[Event])
 async def get_volunteer_events(user: dict = Depends(get_current_user)):
     """Returns events joined by the current volunteer"""
@@ -568,13 +991,14 @@ async def get_volunteer_events(user: dict = Depends(get_current_user)):
         if user["role"] != "volunteer":
             raise HTTPException(status_code=403, detail="Volunteer access only")
 
-        volunteer = volunteers_collection.find_one({"_id": ObjectId(user["user_id"])})
+        volunteer = await volunteers_collection.find_one({"_id": ObjectId(user["user_id"])})
         if not volunteer:
             raise HTTPException(status_code=404, detail="Volunteer not found")
 
-        event_ids = volunteer.get("registered_events", [])
-        events = list(events_collection.find({"event_id": {"$in": event_ids}}))
-        return [Event(**event_serializer(event)) for event in events]
+        events = await load_events(volunteer.get("registered_events", []))
+        return events_json_response(events)
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error fetching volunteer events: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch volunteer events")
@@ -583,61 +1007,34 @@ async def get_volunteer_events(user: dict = Depends(get_current_user)):
 async def scan_qr_code(
     event_id: int,
     user: dict = Depends(get_current_user),
-    email_service: EmailService = Depends()
+    idempotency_key: Optional[str] = Header(None)
 ):
     """
-    Endpoint for scanning QR code to confirm attendance
+    Endpoint for scanning QR code to confirm attendance. Retries sent with the
+    same Idempotency-Key header get the original response back.
     """
     if user["role"] != "volunteer":
         raise HTTPException(status_code=403, detail="Only volunteers can scan QR codes")
-    
-    # Get event
-    event = events_collection.find_one({"event_id": event_id})
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
-    
-    # Check if volunteer is registered for this event
-    if str(user["user_id"]) not in event.get("registered_volunteers", []):
-        raise HTTPException(status_code=400, detail="You must register for this event first")
-    
-    # Check if volunteer already attended (optional)
-    volunteer = volunteers_collection.find_one({"_id": ObjectId(user["user_id"])})
-    if str(event_id) in volunteer.get("attended_events", []):
-        raise HTTPException(status_code=400, detail="You already attended this event")
-    
-    # Update volunteer's points and attended events
-    points_to_add = 10  # Or calculate based on event duration/type
-    volunteers_collection.update_one(
-        {"_id": ObjectId(user["user_id"])},
-        {
-            "$inc": {"points": points_to_add},
-            "$push": {"attended_events": str(event_id)}
-        }
-    )
-    
-    # Send confirmation email
-    volunteer_data = volunteers_collection.find_one({"_id": ObjectId(user["user_id"])})
-    email_service.send_participation_confirmation(
-        volunteer_email=volunteer_data["email"],
-        volunteer_name=f"{volunteer_data['first_name']} {volunteer_data['last_name']}",
-        event_name=event["event_name"],
-        event_details=event
+
+    return await run_idempotent(
+        f"scan:{user['user_id']}:{event_id}",
+        idempotency_key,
+        lambda: record_attendance(str(user["user_id"]), event_id)
     )
-    
-    return {
-        "message": "Attendance confirmed!",
-        "points_added": points_to_add,
-        "total_points": volunteer_data.get("points", 0) + points_to_add
-    }
 
 @router.post("/events/batch")
-async def get_events_batch(event_ids: List[int]):
-    """Returns multiple events by their IDs"""
+async def get_events_batch(event_ids: List[int], fields: Optional[str] = Query(None)):
+    """
+    Returns multiple events by their IDs, in the order requested. Duplicate ids
+    are returned once and ids with no event are left out.
+    """
+    if len(event_ids) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} event ids per request")
+    field_list = parse_fields(fields, set(Event.model_fields), ["event_id"])
     try:
-        events = list(events_collection.find({
-            "event_id": {"$in": event_ids}
-        }))
-        return [event_serializer(event) for event in events]
+        projection = {field: 1 for field in field_list} if field_list else EVENT_PROJECTION
+        events = await load_events(event_ids, projection)
+        return events_json_response(events, fields=field_list)
     except Exception as e:
         logging.error(f"Error fetching batch events: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch events")
\ No newline at end of file
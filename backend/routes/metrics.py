@@ -0,0 +1,45 @@
+from fastapi import APIRouter
+from database.database import pool_stats
+from services.hashing import password_hasher
+from services.id_allocator import event_id_allocator
+from services.jobs import job_queue
+from services.mail_transport import mail_outbox
+from services.response_cache import response_cache
+from services.uploads import image_store
+
+router = APIRouter()
+
+@router.get("/metrics/db-pool", response_model=dict)
+async def get_db_pool_metrics():
+    """Returns MongoDB connection pool statistics for this worker"""
+    return pool_stats.snapshot()
+
+@router.get("/metrics/jobs", response_model=dict)
+async def get_job_metrics():
+    """Returns background job queue counters for this worker"""
+    return job_queue.snapshot()
+
+@router.get("/metrics/mail", response_model=dict)
+async def get_mail_metrics():
+    """Returns outbox depth and SMTP pool counters for this worker"""
+    return mail_outbox.snapshot()
+
+@router.get("/metrics/hashing", response_model=dict)
+async def get_hashing_metrics():
+    """Returns password hashing pool load and argon2 latency percentiles for this worker"""
+    return password_hasher.snapshot()
+
+@router.get("/metrics/cache", response_model=dict)
+async def get_cache_metrics():
+    """Returns response cache hit/miss counters for this worker"""
+    return response_cache.snapshot()
+
+@router.get("/metrics/ids", response_model=dict)
+async def get_id_metrics():
+    """Returns event id leasing counters for this worker"""
+    return event_id_allocator.snapshot()
+
+@router.get("/metrics/uploads", response_model=dict)
+async def get_upload_metrics():
+    """Returns image upload, dedup and resize counters for this worker"""
+    return image_store.snapshot()
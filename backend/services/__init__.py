@@ -1,5 +1,4 @@
-from .email_handler import EmailService
+from .email_handler import EmailService, get_email_service
 from .geocoding import get_coordinates
-email_service = EmailService()
 
-__all__ = ['email_service']
\ No newline at end of file
+__all__ = ['EmailService', 'get_email_service']
\ No newline at end of file
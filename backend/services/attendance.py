@@ -0,0 +1,73 @@
+import asyncio
+import logging
+import os
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from database.database import events_collection, registrations_collection, volunteers_collection
+from services.email_handler import get_email_service
+from services.jobs import job_queue
+from services.leaderboard import leaderboard
+
+logger = logging.getLogger(__name__)
+
+SEND_PARTICIPATION_CONFIRMATION_JOB = "send_participation_confirmation"
+
+# Points awarded for each attended event
+ATTENDANCE_POINTS = int(os.getenv("ATTENDANCE_POINTS", 10))
+
+# Event fields used by the participation confirmation email
+CONFIRMATION_EVENT_PROJECTION = {
+    "_id": 0, "event_id": 1, "event_name": 1, "organization": 1, "date": 1,
+    "time": 1, "venue": 1, "address": 1, "contact_email": 1,
+}
+
+
+@job_queue.register(SEND_PARTICIPATION_CONFIRMATION_JOB)
+async def send_participation_confirmation(payload: dict):
+    get_email_service().send_participation_confirmation(**payload)
+
+
+async def record_attendance(volunteer_id: str, event_id: int) -> dict:
+    """
+    Awards points for attending an event. The "not attended yet" check and the
+    award are one conditional update, so parallel scans award points once.
+    """
+    event, registered = await asyncio.gather(
+        events_collection.find_one({"event_id": event_id}, CONFIRMATION_EVENT_PROJECTION),
+        registrations_collection.count_documents({"event_id": event_id, "volunteer_id": volunteer_id}, limit=1),
+    )
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if not registered:
+        raise HTTPException(status_code=400, detail="You must register for this event first")
+
+    volunteer = await volunteers_collection.find_one_and_update(
+        {"_id": ObjectId(volunteer_id), "attended_events": {"$ne": str(event_id)}},
+        {
+            "$inc": {"points": ATTENDANCE_POINTS, "events_attended": 1},
+            "$addToSet": {"attended_events": str(event_id)}
+        },
+        projection={"first_name": 1, "last_name": 1, "email": 1, "points": 1, "events_attended": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if volunteer is None:
+        raise HTTPException(status_code=400, detail="You already attended this event")
+    leaderboard.set(volunteer)
+
+    # Rendering and sending happen off the request path; the points are already awarded
+    try:
+        await job_queue.enqueue(SEND_PARTICIPATION_CONFIRMATION_JOB, {
+            "volunteer_email": volunteer["email"],
+            "volunteer_name": f"{volunteer['first_name']} {volunteer['last_name']}",
+            "event_name": event["event_name"],
+            "event_details": event,
+        })
+    except Exception as e:
+        logger.error(f"Failed to queue participation confirmation for event {event_id}: {e}")
+
+    return {
+        "message": "Attendance confirmed!",
+        "points_added": ATTENDANCE_POINTS,
+        "total_points": volunteer.get("points", 0)
+    }
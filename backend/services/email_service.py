@@ -1,12 +1,12 @@
 import os
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
 from fastapi import HTTPException
 import logging
 from datetime import datetime
-from typing import Optional, dict
+from typing import Optional
+from services.mail_transport import SMTPConnectionPool
 
 # Load environment variables
 load_dotenv()
@@ -20,6 +20,9 @@ class EmailService:
         self.sender_email = os.getenv("SENDER_EMAIL")
         self.sender_name = os.getenv("SENDER_NAME")
         self.app_name = os.getenv("APP_NAME")
+        self.transport = SMTPConnectionPool(
+            self.smtp_server, self.smtp_port, self.smtp_username, self.smtp_password
+        )
 
     def _create_message(
         self,
@@ -53,11 +56,9 @@ class EmailService:
             # Create message
             msg = self._create_message(recipient, subject, body, is_html, recipient_name)
             
-            # Connect and send
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
-                server.send_message(msg)
+            # Send over a pooled, already-authenticated connection
+            if not self.transport.send(msg):
+                raise RuntimeError(f"SMTP delivery to {recipient} failed")
             
             return True
         except Exception as e:
@@ -0,0 +1,169 @@
+import csv
+import io
+import json
+import os
+import re
+from datetime import datetime as dt, timedelta, timezone
+from pydantic import ValidationError
+from services.event_pipeline import PROCESSING_PENDING
+from services.search import normalize_text
+from services.serialization import event_adapter, event_serializer
+
+# Limits for one POST /events/import upload
+MAX_IMPORT_ROWS = int(os.getenv("MAX_IMPORT_ROWS", 1000))
+MAX_IMPORT_BYTES = int(os.getenv("MAX_IMPORT_BYTES", 5 * 1024 * 1024))
+
+# Columns of an import row, also used (after event_id) for CSV exports so an
+# export can be edited and imported again
+IMPORT_FIELDS = [
+    "event_name", "description", "category", "date", "time", "venue", "city", "address",
+    "duration", "volunteer_requirements", "skills_required", "contact_email",
+    "contact_person_name", "contact_person_number", "registration_deadline",
+    "additional_notes", "image_url",
+]
+REQUIRED_FIELDS = [
+    "event_name", "description", "category", "date", "time", "venue", "city", "address",
+    "duration", "skills_required", "contact_email", "contact_person_name",
+    "contact_person_number", "registration_deadline",
+]
+EMAIL_PATTERN = r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$"
+
+
+class RowError(ValueError):
+    """A row that cannot be imported; the message is reported back for that row"""
+
+
+def parse_rows(content: bytes, format: str) -> list:
+    """
+    Splits an upload into (line, row) pairs. A row that cannot be parsed is
+    returned as a RowError in place of the dict, so it is reported like any
+    other invalid row.
+    """
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise RowError("File must be UTF-8 encoded")
+
+    if format == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        # line_num is the reader's position after the row, so multi-line cells are counted
+        return [(reader.line_num, row) for row in reader]
+
+    rows = []
+    for line, raw in enumerate(text.splitlines(), start=1):
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except ValueError as e:
+            row = RowError(f"Invalid JSON: {e}")
+        if not isinstance(row, (dict, RowError)):
+            row = RowError("Each line must be a JSON object")
+        rows.append((line, row))
+    return rows
+
+
+def _text(row: dict, field: str) -> str:
+    value = row.get(field)
+    return "" if value is None else str(value).strip()
+
+
+def build_event(row: dict, organization: str) -> dict:
+    """
+    Turns one import row into an event document (without event_id), applying
+    the same checks as POST /events and then validating it against the Event
+    model. Raises RowError describing the first problem found.
+    """
+    # NDJSON rows may nest the contact person and list the skills, like the API returns them
+    contact_person = row.get("contact_person")
+    if isinstance(contact_person, dict):
+        row = {
+            **row,
+            "contact_person_name": contact_person.get("name"),
+            "contact_person_number": contact_person.get("contact_number"),
+        }
+    skills = row.get("skills_required")
+    if isinstance(skills, list):
+        skills_list = [str(skill).strip() for skill in skills if str(skill).strip()]
+    else:
+        skills_list = [skill.strip() for skill in _text(row, "skills_required").split(",") if skill.strip()]
+
+    for field in REQUIRED_FIELDS:
+        if not _text(row, field):
+            raise RowError(f"{field.replace('_', ' ').title()} cannot be empty")
+
+    if not re.fullmatch(EMAIL_PATTERN, _text(row, "contact_email")):
+        raise RowError("Invalid contact email format.")
+
+    date, time, deadline = _text(row, "date"), _text(row, "time"), _text(row, "registration_deadline")
+    try:
+        event_datetime = dt.strptime(f"{date} {time if len(time) > 5 else time + ':00'}", "%Y-%m-%d %H:%M:%S")
+        deadline_date = dt.strptime(deadline, "%Y-%m-%d").date()
+    except ValueError as e:
+        raise RowError(f"Invalid date/time format: {e}")
+
+    requirements = _text(row, "volunteer_requirements")
+    try:
+        max_capacity = int(requirements) if requirements else 0
+    except ValueError:
+        raise RowError("Volunteer requirements must be a whole number")
+
+    event_name = _text(row, "event_name")
+    event = {
+        "event_name": event_name,
+        "event_name_normalized": normalize_text(event_name),
+        "organization": organization,
+        "description": _text(row, "description"),
+        "category": _text(row, "category"),
+        "date": date,
+        "time": time,
+        "venue": _text(row, "venue"),
+        "city": _text(row, "city"),
+        "address": _text(row, "address"),
+        "latitude": None,
+        "longitude": None,
+        "duration": _text(row, "duration"),
+        "volunteer_requirements": max_capacity,
+        "skills_required": skills_list,
+        "contact_email": _text(row, "contact_email"),
+        "contact_person": {
+            "name": _text(row, "contact_person_name"),
+            "contact_number": _text(row, "contact_person_number")
+        },
+        "image_url": _text(row, "image_url"),
+        "registration_deadline": deadline,
+        "additional_notes": _text(row, "additional_notes"),
+        "status": "Open" if deadline_date >= dt.now(timezone.utc).date() else "Closed",
+        "total_registered_volunteers": 0,
+        "created_at": dt.now(timezone.utc).isoformat(),
+        "expireAt": event_datetime + timedelta(days=1),
+        "processing_status": PROCESSING_PENDING,
+        "version": 1,
+        "updated_at": dt.now(timezone.utc)
+    }
+    try:
+        event_adapter.validate_python(event_serializer({**event, "event_id": 0}))
+    except ValidationError as e:
+        error = e.errors()[0]
+        raise RowError(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}")
+    return event
+
+
+def event_to_csv_row(event: dict) -> list:
+    """Flattens an event into the CSV export columns (event_id, then IMPORT_FIELDS)"""
+    contact_person = event.get("contact_person") or {}
+    values = {
+        **event,
+        "skills_required": ", ".join(event.get("skills_required") or []),
+        "contact_person_name": contact_person.get("name"),
+        "contact_person_number": contact_person.get("contact_number"),
+    }
+    return [event.get("event_id")] + [
+        "" if values.get(field) is None else values[field] for field in IMPORT_FIELDS
+    ]
+
+
+def csv_line(values: list) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
@@ -0,0 +1,66 @@
+import os
+from typing import Iterable, Optional
+from database.database import events_collection
+from services.serialization import EVENT_PROJECTION
+
+# Most ids a client can ask for in one POST /events/batch call, and the size of
+# each $in query when a larger list is loaded internally
+MAX_BATCH_SIZE = int(os.getenv("EVENT_BATCH_MAX_SIZE", 100))
+
+
+def normalize_event_ids(ids: Iterable) -> list:
+    """
+    Converts ids to ints and drops duplicates, keeping first-seen order.
+    registered_events stores ids as strings while events use ints; anything
+    that is not a whole number is skipped.
+    """
+    normalized = {}
+    for event_id in ids:
+        if isinstance(event_id, bool):
+            continue
+        if isinstance(event_id, str):
+            event_id = event_id.strip()
+            if not event_id.lstrip("-").isdigit():
+                continue
+            event_id = int(event_id)
+        if isinstance(event_id, int):
+            normalized[event_id] = None
+    return list(normalized)
+
+
+class EventLoader:
+    """
+    DataLoader-style batch fetch of events by id. Ids already loaded are served
+    from memory, the rest are fetched with one $in query per MAX_BATCH_SIZE ids,
+    and results come back in the requested order with missing events left out.
+    Meant to live for a single request; round_trips counts the queries it made.
+    """
+
+    def __init__(self, projection: Optional[dict] = None, batch_size: int = MAX_BATCH_SIZE):
+        projection = dict(projection or EVENT_PROJECTION)
+        projection["event_id"] = 1  # results are matched back to ids by event_id
+        self.projection = projection
+        self.batch_size = batch_size
+        self.round_trips = 0
+        self._loaded = {}  # event_id -> document, or None if it does not exist
+
+    async def load_many(self, ids: Iterable) -> list:
+        event_ids = normalize_event_ids(ids)
+        missing = [event_id for event_id in event_ids if event_id not in self._loaded]
+        for start in range(0, len(missing), self.batch_size):
+            chunk = missing[start:start + self.batch_size]
+            self.round_trips += 1
+            documents = await events_collection.find({"event_id": {"$in": chunk}}, self.projection).to_list(None)
+            for event_id in chunk:
+                self._loaded[event_id] = None
+            for document in documents:
+                self._loaded[document["event_id"]] = document
+        return [self._loaded[event_id] for event_id in event_ids if self._loaded[event_id] is not None]
+
+    async def load(self, event_id) -> Optional[dict]:
+        events = await self.load_many([event_id])
+        return events[0] if events else None
+
+
+async def load_events(ids: Iterable, projection: Optional[dict] = None) -> list:
+    return await EventLoader(projection).load_many(ids)
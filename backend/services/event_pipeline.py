@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from database.database import events_collection, organizations_collection
+from services.email_handler import get_email_service
+from services.geocoding import get_coordinates, geo_point
+from services.jobs import job_queue, PermanentJobError
+from services.search import normalize_text
+from services.uploads import InvalidImageError, image_store
+from services.versioning import mark_events_changed, versioned
+
+logger = logging.getLogger(__name__)
+
+PROCESS_EVENT_JOB = "process_event"
+PROCESS_IMPORTED_EVENTS_JOB = "process_imported_events"
+
+# processing_status values, in pipeline order
+PROCESSING_PENDING = "pending"
+PROCESSING_GEOCODING = "geocoding"
+PROCESSING_UPLOADING = "uploading_image"
+PROCESSING_EMAILING = "sending_qr_email"
+PROCESSING_READY = "ready"
+PROCESSING_FAILED = "failed"
+PROCESSING_IN_PROGRESS = [PROCESSING_PENDING, PROCESSING_GEOCODING, PROCESSING_UPLOADING, PROCESSING_EMAILING]
+
+# Jobs live in memory, so a restart drops them. Events still in progress this
+# long after their last update are recovered by ProcessingSweeper; keep it above
+# the slowest import (MAX_IMPORT_ROWS new addresses at NOMINATIM_MIN_INTERVAL).
+PROCESSING_STALE_AFTER_SECONDS = float(os.getenv("PROCESSING_STALE_AFTER_SECONDS", 3600))
+PROCESSING_SWEEP_INTERVAL_SECONDS = float(os.getenv("PROCESSING_SWEEP_INTERVAL_SECONDS", 300))
+
+# Public listings only show ready events: pending or failed ones may still lack
+# coordinates and an image. Events created before the pipeline have no status.
+LISTED_EVENT_FILTER = {"processing_status": {"$in": [None, PROCESSING_READY]}}
+
+
+def listed_events(query: dict) -> dict:
+    """Restricts an event query to events that can be shown in public listings"""
+    return {**query, **LISTED_EVENT_FILTER}
+
+
+async def _set_processing_status(event_id: int, processing_status: str, **fields):
+    await events_collection.update_one(
+        {"event_id": event_id},
+        versioned({"$set": {"processing_status": processing_status, **fields}})
+    )
+    # Each step's field updates are followed by a status change, so this covers them too
+    await mark_events_changed(event_id)
+
+
+async def _send_event_qr(email_service, event: dict, organization_email: str):
+    # Rendering the QR PNG is CPU-bound, so it runs in a thread and lands in the
+    # render cache; the email itself is built and queued on the loop
+    await asyncio.to_thread(email_service.generate_qr_code, event["event_id"], event["event_name"])
+    email_service.send_event_qr_to_organization(
+        event_id=event["event_id"],
+        event_name=event["event_name"],
+        organization_email=organization_email,
+        event_details=event
+    )
+
+
+async def _mark_event_failed(payload: dict, error: Exception):
+    payload["image"].close()
+    await _set_processing_status(payload["event_id"], PROCESSING_FAILED, processing_error=str(error))
+
+
+@job_queue.register(PROCESS_EVENT_JOB, on_dead_letter=_mark_event_failed)
+async def process_new_event(payload: dict):
+    """
+    Post-create side effects for an event: geocode, upload the banner, email the QR code.
+    Each step checks the stored event first, so a retried job resumes where it failed.
+    """
+    event_id = payload["event_id"]
+    event = await events_collection.find_one({"event_id": event_id})
+    if not event:
+        raise PermanentJobError(f"Event {event_id} no longer exists")
+
+    if event.get("latitude") is None or event.get("longitude") is None:
+        await _set_processing_status(event_id, PROCESSING_GEOCODING)
+        # A GeocodingError (Nominatim down) propagates and the job is retried;
+        # only an address with no match fails the event
+        latitude, longitude = await get_coordinates(event["address"])
+        if latitude is None or longitude is None:
+            raise PermanentJobError("Invalid address")
+        await events_collection.update_one(
+            {"event_id": event_id},
+            {"$set": {"latitude": latitude, "longitude": longitude, "location": geo_point(latitude, longitude)}}
+        )
+
+    if not event.get("image_url"):
+        await _set_processing_status(event_id, PROCESSING_UPLOADING)
+        try:
+            image_url = await image_store.store(payload["image"], "event_images")
+        except InvalidImageError as e:
+            raise PermanentJobError(str(e))
+        await events_collection.update_one({"event_id": event_id}, {"$set": {"image_url": image_url}})
+    payload["image"].close()
+
+    # A failed QR email should not fail the event, same as when this ran in the request
+    await _set_processing_status(event_id, PROCESSING_EMAILING)
+    try:
+        event = await events_collection.find_one({"event_id": event_id})
+        await _send_event_qr(get_email_service(), event, payload["organization_email"])
+    except Exception as e:
+        logger.error(f"Failed to send QR code email to organization: {e}")
+
+    await _set_processing_status(event_id, PROCESSING_READY)
+
+
+async def _mark_imported_events_failed(payload: dict, error: Exception):
+    event_ids = payload["event_ids"]
+    await events_collection.update_many(
+        {"event_id": {"$in": event_ids}, "processing_status": {"$ne": PROCESSING_READY}},
+        versioned({"$set": {"processing_status": PROCESSING_FAILED, "processing_error": str(error)}})
+    )
+    await mark_events_changed(*event_ids)
+
+
+@job_queue.register(PROCESS_IMPORTED_EVENTS_JOB, on_dead_letter=_mark_imported_events_failed)
+async def process_imported_events(payload: dict):
+    """
+    Post-import side effects for a batch of events: each distinct address is
+    geocoded once and written to every event that shares it, then the QR codes
+    are emailed. Imported events carry an image URL (or none), so there is no upload.
+    """
+    event_ids = payload["event_ids"]
+    events = await events_collection.find(
+        {"event_id": {"$in": event_ids}, "processing_status": {"$ne": PROCESSING_READY}},
+        {"event_id": 1, "address": 1, "latitude": 1, "longitude": 1}
+    ).to_list(None)
+
+    by_address = {}
+    for event in events:
+        if event.get("latitude") is None or event.get("longitude") is None:
+            by_address.setdefault(normalize_text(event["address"]), []).append(event)
+    # Addresses resolved before a GeocodingError keep their coordinates, so a retry resumes after them
+    for address_events in by_address.values():
+        ids = [event["event_id"] for event in address_events]
+        latitude, longitude = await get_coordinates(address_events[0]["address"])
+        if latitude is None or longitude is None:
+            update = {"processing_status": PROCESSING_FAILED, "processing_error": "Invalid address"}
+        else:
+            update = {"latitude": latitude, "longitude": longitude, "location": geo_point(latitude, longitude)}
+        await events_collection.update_many({"event_id": {"$in": ids}}, versioned({"$set": update}))
+
+    email_service = get_email_service()
+    ready = []
+    async for event in events_collection.find(
+        {"event_id": {"$in": event_ids}, "processing_status": PROCESSING_PENDING}
+    ):
+        try:
+            await _send_event_qr(email_service, event, payload["organization_email"])
+        except Exception as e:
+            logger.error(f"Failed to send QR code email for imported event {event['event_id']}: {e}")
+        ready.append(event["event_id"])
+
+    await events_collection.update_many(
+        {"event_id": {"$in": ready}},
+        versioned({"$set": {"processing_status": PROCESSING_READY}})
+    )
+    await mark_events_changed(*event_ids)
+
+
+async def sweep_stale_events() -> dict:
+    """
+    Recovers events whose processing job was lost. Events still waiting for
+    their image are marked failed, since the upload was only held by the job;
+    the rest are claimed and queued again like an import, which finishes the
+    geocoding and sends the QR email.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=PROCESSING_STALE_AFTER_SECONDS)
+    stale = {"processing_status": {"$in": PROCESSING_IN_PROGRESS}, "updated_at": {"$lt": cutoff}}
+
+    without_image = await events_collection.find(
+        {**stale, "image_url": {"$in": [None, ""]}}, {"event_id": 1}
+    ).to_list(None)
+    failed_ids = [event["event_id"] for event in without_image]
+    if failed_ids:
+        await events_collection.update_many(
+            {**stale, "event_id": {"$in": failed_ids}},
+            versioned({"$set": {
+                "processing_status": PROCESSING_FAILED,
+                "processing_error": "Processing was interrupted before the image was uploaded",
+            }})
+        )
+
+    # Every worker sweeps; the claim makes sure each event is queued again by one of them
+    claim = uuid.uuid4().hex
+    await events_collection.update_many(
+        stale, versioned({"$set": {"processing_status": PROCESSING_PENDING, "processing_claim": claim}})
+    )
+    claimed = await events_collection.find({"processing_claim": claim}, {"event_id": 1, "organization": 1}).to_list(None)
+    by_organization = {}
+    for event in claimed:
+        by_organization.setdefault(event["organization"], []).append(event["event_id"])
+    organizations = await organizations_collection.find(
+        {"name": {"$in": list(by_organization)}}, {"name": 1, "email": 1}
+    ).to_list(None)
+    emails = {organization["name"]: organization.get("email") for organization in organizations}
+    for organization, event_ids in by_organization.items():
+        await job_queue.enqueue(PROCESS_IMPORTED_EVENTS_JOB, {
+            "event_ids": event_ids,
+            "organization_email": emails.get(organization),
+        })
+
+    requeued_ids = [event["event_id"] for event in claimed]
+    if failed_ids or requeued_ids:
+        logger.warning(f"Recovered stale events: {len(failed_ids)} failed, {len(requeued_ids)} queued again")
+        await mark_events_changed(*failed_ids, *requeued_ids)
+    return {"failed": failed_ids, "requeued": requeued_ids}
+
+
+class ProcessingSweeper:
+    """Background task that runs sweep_stale_events() every interval seconds, starting at once"""
+
+    def __init__(self, interval: float = PROCESSING_SWEEP_INTERVAL_SECONDS):
+        self.interval = interval
+        self._task = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await sweep_stale_events()
+            except Exception as e:
+                logger.error(f"Sweeping stale events failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+processing_sweeper = ProcessingSweeper()
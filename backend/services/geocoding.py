@@ -1,20 +1,248 @@
-import requests
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+import httpx
+from database.database import geocode_cache_collection
+from services.search import normalize_text
 
-NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+logger = logging.getLogger(__name__)
 
-def get_coordinates(address: str):
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
+# Nominatim's usage policy allows at most one request per second
+NOMINATIM_MIN_INTERVAL = float(os.getenv("NOMINATIM_MIN_INTERVAL", 1.0))
+GEOCODE_TIMEOUT = float(os.getenv("GEOCODE_TIMEOUT", 5))
+# How long resolved addresses (and addresses with no match) stay cached
+GEOCODE_CACHE_TTL_DAYS = int(os.getenv("GEOCODE_CACHE_TTL_DAYS", 90))
+GEOCODE_MISS_TTL_HOURS = int(os.getenv("GEOCODE_MISS_TTL_HOURS", 24))
+
+
+class GeocodingError(Exception):
+    """Nominatim could not be reached or returned an error, so the address may still be valid"""
+
+
+class RateLimiter:
+    """Spaces calls at least min_interval seconds apart across all callers"""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = asyncio.Lock()
+        self._last_call = 0.0
+
+    async def wait(self):
+        async with self._lock:
+            delay = self._last_call + self.min_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._last_call = time.monotonic()
+
+
+class Geocoder:
     """
-    Converts an address into latitude and longitude using OpenStreetMap's Nominatim API.
-    Returns a tuple (latitude, longitude) or (None, None) if conversion fails.
+    Async Nominatim client with a persistent Mongo cache (TTL-indexed), coalescing
+    of concurrent lookups for the same address and a global rate limit.
     """
-    params = {"q": address, "format": "json"}
-    headers = {"User-Agent": "PledgeIt-GeoLookup/1.0"}
-    try:
-        response = requests.get(NOMINATIM_URL, params=params, headers=headers, timeout=5)
-        response.raise_for_status()
-        data = response.json()
+
+    def __init__(self, url: str = NOMINATIM_URL, min_interval: float = NOMINATIM_MIN_INTERVAL):
+        self.url = url
+        self.rate_limiter = RateLimiter(min_interval)
+        self._client = None
+        self._in_flight = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=GEOCODE_TIMEOUT,
+                headers={"User-Agent": "PledgeIt-GeoLookup/1.0"}
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get_coordinates(self, address: str):
+        """
+        Returns (latitude, longitude) for an address, or (None, None) if it has no match.
+        Raises GeocodingError when the lookup itself fails, so callers can retry.
+        """
+        key = normalize_text(address)
+        if not key:
+            return None, None
+
+        cached = await geocode_cache_collection.find_one({"_id": key})
+        if cached:
+            return cached.get("latitude"), cached.get("longitude")
+
+        # Concurrent requests for the same address share one upstream lookup
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._resolve(key, address))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._done(key, future))
+        return await asyncio.shield(future)
+
+    def _done(self, key: str, future):
+        self._in_flight.pop(key, None)
+        # Mark a failure as seen even if every caller was cancelled while waiting
+        if not future.cancelled():
+            future.exception()
+
+    async def _resolve(self, key: str, address: str):
+        # Upstream failures raise before anything is cached, so the next request retries
+        latitude, longitude = await self._fetch(address)
+        ttl = timedelta(days=GEOCODE_CACHE_TTL_DAYS) if latitude is not None else timedelta(hours=GEOCODE_MISS_TTL_HOURS)
+        try:
+            await geocode_cache_collection.update_one(
+                {"_id": key},
+                {"$set": {
+                    "address": address,
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "expireAt": datetime.now(timezone.utc) + ttl,
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to cache geocoding result: {e}")
+        return latitude, longitude
+
+    async def _fetch(self, address: str):
+        """Queries Nominatim. Returns (lat, lon) or (None, None) for no match; raises GeocodingError on error."""
+        await self.rate_limiter.wait()
+        try:
+            response = await self._get_client().get(self.url, params={"q": address, "format": "json"})
+            response.raise_for_status()
+            data = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"Geocoding Error: {e}")
+            raise GeocodingError(f"Geocoding failed: {e}") from e
         if data and len(data) > 0:
             return float(data[0]["lat"]), float(data[0]["lon"])
-    except requests.exceptions.RequestException as e:
-        print(f"Geocoding Error: {e}")
-    return None, None
+        return None, None
+
+
+geocoder = Geocoder()
+
+
+async def get_coordinates(address: str):
+    """
+    Converts an address into latitude and longitude using OpenStreetMap's Nominatim API.
+    Returns a tuple (latitude, longitude), or (None, None) if the address has no match.
+    Raises GeocodingError if the service is unavailable.
+    """
+    return await geocoder.get_coordinates(address)
+
+def geo_point(latitude: float, longitude: float) -> dict:
+    """GeoJSON point for the 2dsphere-indexed location field (GeoJSON is [lon, lat])"""
+    return {"type": "Point", "coordinates": [longitude, latitude]}
+
+
+def nearby_pipeline(latitude: float, longitude: float, radius_km: float, query: dict, limit: int) -> list:
+    """$geoNear pipeline for events matching query within radius_km of a point, nearest first"""
+    return [
+        {"$geoNear": {
+            "near": geo_point(latitude, longitude),
+            "key": "location",
+            "distanceField": "distance_m",
+            "maxDistance": radius_km * 1000,
+            "spherical": True,
+            "query": query,
+        }},
+        {"$limit": limit},
+    ]
+
+
+async def _bench(events: int, queries: int, radius_km: float, db_name: str):
+    """
+    Compares /events/nearby's $geoNear query with what the map did before:
+    download every listed event and filter by distance on the client.
+    Seeds db_name with events spread over Sri Lanka and drops it after.
+    """
+    import math
+    import random
+    import statistics
+    from database import database
+    from database.database import events_collection
+    from database.indexes import INDEXES
+    from services.event_pipeline import PROCESSING_READY, listed_events
+    from services.serialization import EVENT_PROJECTION, events_to_json
+
+    if db_name == database.DB_NAME:
+        raise SystemExit("Refusing to seed and drop the application database; pass another --db")
+
+    def distance_km(lat1, lon1, lat2, lon2):
+        lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        return 6371.0088 * 2 * math.asin(math.sqrt(a))
+
+    def percentiles(seconds: list) -> str:
+        cuts = statistics.quantiles(seconds, n=100) if len(seconds) > 1 else seconds * 99
+        return f"p50 {cuts[49] * 1000:.1f} ms, p99 {cuts[98] * 1000:.1f} ms"
+
+    rng = random.Random(7)
+    categories = ["Environment", "Education", "Health", "Community", "Animals"]
+    database.connect(db_name)
+    try:
+        await events_collection.create_indexes(INDEXES[events_collection.name])
+        for first in range(1, events + 1, 10000):
+            batch = []
+            for event_id in range(first, min(first + 10000, events + 1)):
+                latitude, longitude = rng.uniform(5.9, 9.8), rng.uniform(79.7, 81.9)
+                batch.append({
+                    "event_id": event_id, "event_name": f"Event {event_id}", "organization": "PledgeIt",
+                    "description": "Volunteers needed " * 10, "category": rng.choice(categories),
+                    "date": "2030-01-01", "time": "09:00:00", "venue": "Town Hall", "city": "Colombo",
+                    "address": "Main Street", "latitude": latitude, "longitude": longitude,
+                    "location": geo_point(latitude, longitude), "duration": "3 hours", "volunteer_requirements": 20,
+                    "skills_required": ["Teamwork"], "contact_email": "events@pledgeit.lk",
+                    "contact_person": {"name": "Organizer", "contact_number": "0770000000"},
+                    "image_url": "https://example.com/event.png", "registration_deadline": "2029-12-30",
+                    "additional_notes": "", "status": "Open", "total_registered_volunteers": 0,
+                    "created_at": "2029-12-01T00:00:00", "expireAt": "2030-01-02T00:00:00",
+                    "processing_status": PROCESSING_READY,
+                })
+            await events_collection.insert_many(batch)
+
+        points = [(rng.uniform(6.0, 9.7), rng.uniform(79.8, 81.8)) for _ in range(queries)]
+        server, client, payload, matched = [], [], 0, 0
+        for latitude, longitude in points:
+            start = time.perf_counter()
+            cursor = await events_collection.aggregate(
+                nearby_pipeline(latitude, longitude, radius_km, listed_events({}), 100) + [{"$project": EVENT_PROJECTION}]
+            )
+            nearby = await cursor.to_list(None)
+            server.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            everything = await events_collection.find(listed_events({}), EVENT_PROJECTION).to_list(None)
+            payload = len(events_to_json(everything))
+            in_radius = sorted(
+                (distance_km(latitude, longitude, event["latitude"], event["longitude"]), event["event_id"])
+                for event in everything
+            )
+            filtered = [event_id for distance, event_id in in_radius if distance <= radius_km][:100]
+            client.append(time.perf_counter() - start)
+            matched += {event["event_id"] for event in nearby} == set(filtered)
+
+        print(f"{events} events, {queries} points, radius {radius_km} km, up to 100 results")
+        print(f"$geoNear on the 2dsphere index: {percentiles(server)}")
+        print(f"download all + client filter:   {percentiles(client)} (JSON body of {payload / 1e6:.1f} MB per load)")
+        print(f"same results for {matched}/{queries} points")
+    finally:
+        await database.client.drop_database(db_name)
+        await database.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="/events/nearby vs client-side distance filtering against MONGO_URI")
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("-q", "--queries", type=int, default=20)
+    parser.add_argument("-r", "--radius-km", type=float, default=10)
+    parser.add_argument("--db", default="pledgeit_bench", help="scratch database, dropped afterwards")
+    args = parser.parse_args()
+    asyncio.run(_bench(args.events, args.queries, args.radius_km, args.db))
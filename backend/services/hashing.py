@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+# argon2 cost parameters (passlib defaults). Raising them makes every login slower;
+# existing hashes are upgraded on the next successful login.
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", 3))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", 65536))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", 4))
+
+# argon2-cffi releases the GIL, so a thread pool gives real parallelism.
+# HASH_QUEUE_SIZE more requests may wait for a thread before new ones get a 503.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", os.cpu_count() or 1))
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", HASH_WORKERS * 4))
+HASH_RETRY_AFTER_SECONDS = int(os.getenv("HASH_RETRY_AFTER_SECONDS", 1))
+
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__rounds=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
+)
+
+
+class PasswordHasher:
+    """
+    Runs argon2 on a bounded thread pool so hashing never blocks the event loop.
+    When every worker is busy and the wait queue is full, callers get a 503
+    with Retry-After instead of piling up behind a burst of logins.
+    """
+
+    def __init__(self, context: CryptContext = pwd_context, workers: int = HASH_WORKERS,
+                 queue_size: int = HASH_QUEUE_SIZE, latency_window: int = 1000):
+        self.context = context
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._latencies = deque(maxlen=latency_window)  # (queue wait, hash time) in seconds
+        self.stats = {"completed": 0, "rejected": 0}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="argon2")
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.stats["rejected"] += 1
+                saturated = True
+            else:
+                self._in_flight += 1
+                saturated = False
+        if saturated:
+            logger.warning("Password hashing pool saturated, rejecting request")
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy, please try again shortly",
+                headers={"Retry-After": str(HASH_RETRY_AFTER_SECONDS)}
+            )
+
+        queued_at = time.perf_counter()
+
+        def timed():
+            started_at = time.perf_counter()
+            result = fn(*args)
+            return result, started_at - queued_at, time.perf_counter() - started_at
+
+        try:
+            result, wait, duration = await asyncio.get_running_loop().run_in_executor(self._get_executor(), timed)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        with self._lock:
+            self.stats["completed"] += 1
+            self._latencies.append((wait, duration))
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(self.context.verify, password, hashed)
+
+    async def verify_and_update(self, password: str, hashed: str):
+        """Returns (valid, new_hash); new_hash is set when the stored hash uses outdated parameters"""
+        return await self._run(self.context.verify_and_update, password, hashed)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = list(self._latencies)
+            snapshot = {
+                **self.stats,
+                "in_flight": self._in_flight,
+                "workers": self.workers,
+                "capacity": self.capacity,
+            }
+        waits = sorted(wait for wait, _ in samples)
+        durations = sorted(duration for _, duration in samples)
+        for name, values in (("hash", durations), ("queue_wait", waits)):
+            snapshot[f"{name}_ms"] = {
+                "p50": _percentile(values, 0.50),
+                "p95": _percentile(values, 0.95),
+                "max": round(values[-1] * 1000, 2) if values else None,
+            }
+        return snapshot
+
+
+def _percentile(sorted_values: list, fraction: float):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return round(sorted_values[index] * 1000, 2)
+
+
+password_hasher = PasswordHasher()
+
+
+async def _bench(logins: int, workers: int):
+    """Measures verify throughput (the cost of a login) with the configured argon2 parameters"""
+    hasher = PasswordHasher(workers=workers, queue_size=logins)
+    hashed = await hasher.hash("correct horse battery staple")
+    start = time.perf_counter()
+    await asyncio.gather(*(hasher.verify("correct horse battery staple", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    hasher.shutdown()
+
+    print(f"argon2 time_cost={ARGON2_TIME_COST} memory_cost={ARGON2_MEMORY_COST}KiB parallelism={ARGON2_PARALLELISM}")
+    print(f"{logins} logins on {workers} worker(s) in {elapsed:.2f}s")
+    print(f"logins/s: {logins / elapsed:.1f}, per core: {logins / elapsed / min(workers, os.cpu_count() or 1):.1f}")
+    print(f"latency: {hasher.snapshot()}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="argon2 login throughput benchmark (set ARGON2_* to compare parameters)")
+    parser.add_argument("-n", "--logins", type=int, default=50)
+    parser.add_argument("-w", "--workers", type=int, default=HASH_WORKERS)
+    args = parser.parse_args()
+    asyncio.run(_bench(args.logins, args.workers))
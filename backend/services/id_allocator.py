@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import os
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from database.database import counters_collection, events_collection
+
+logger = logging.getLogger(__name__)
+
+# Ids leased per counter round trip. Ids of a lease that a worker never hands
+# out (e.g. it restarts) are skipped, so event ids have gaps but never repeat.
+EVENT_ID_BLOCK_SIZE = int(os.getenv("EVENT_ID_BLOCK_SIZE", 20))
+
+EVENT_ID_COUNTER = "event_id"
+# Where the counter used to live, inside the events collection
+LEGACY_EVENT_COUNTER_ID = "event_counter"
+
+
+async def _upsert(counter_id: str, update: dict) -> dict:
+    # Two first-time upserts can race on _id; the loser retries as a plain update
+    for attempt in range(2):
+        try:
+            return await counters_collection.find_one_and_update(
+                {"_id": counter_id}, update, upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            if attempt:
+                raise
+
+
+class IdAllocator:
+    """
+    Hands out unique sequential ids from a counter in the counters collection
+    using hi/lo leasing: each worker reserves block_size ids with one atomic
+    $inc and serves creates from that block in memory.
+    """
+
+    def __init__(self, counter_id: str = EVENT_ID_COUNTER, block_size: int = EVENT_ID_BLOCK_SIZE):
+        self.counter_id = counter_id
+        self.block_size = block_size
+        self._next = 0
+        self._limit = 0  # one past the last id of the current lease
+        self._seeded = False
+        self._lock = asyncio.Lock()
+        self.stats = {"allocated": 0, "leases": 0}
+
+    async def seed(self):
+        """
+        Makes sure the counter is past every existing event_id, taking over the
+        legacy event_counter document from the events collection. $max keeps
+        this safe to run from every worker at once.
+        """
+        legacy = await events_collection.find_one({"_id": LEGACY_EVENT_COUNTER_ID})
+        highest_event = await events_collection.find_one(
+            {"event_id": {"$exists": True}}, {"event_id": 1}, sort=[("event_id", -1)]
+        )
+        floor = max(
+            legacy.get("count", 0) if legacy else 0,
+            highest_event["event_id"] if highest_event else 0,
+        )
+        await _upsert(self.counter_id, {"$max": {"value": floor}})
+        if legacy:
+            await events_collection.delete_one({"_id": LEGACY_EVENT_COUNTER_ID})
+            logger.info(f"Moved event_counter ({floor}) to the counters collection")
+        self._seeded = True
+
+    async def _lease(self, size: int):
+        counter = await _upsert(self.counter_id, {"$inc": {"value": size}})
+        self._next, self._limit = counter["value"] - size + 1, counter["value"] + 1
+        self.stats["leases"] += 1
+
+    async def allocate(self, count: int = 1) -> list:
+        """Returns count unused ids, leasing a new block only when the current one runs out"""
+        async with self._lock:
+            if not self._seeded:
+                await self.seed()
+            ids = []
+            while len(ids) < count:
+                if self._next >= self._limit:
+                    # A bulk import leases everything it still needs in one go
+                    await self._lease(max(self.block_size, count - len(ids)))
+                take = min(count - len(ids), self._limit - self._next)
+                ids.extend(range(self._next, self._next + take))
+                self._next += take
+            self.stats["allocated"] += count
+            return ids
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "remaining_in_lease": self._limit - self._next, "block_size": self.block_size}
+
+
+event_id_allocator = IdAllocator()
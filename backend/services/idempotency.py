@@ -0,0 +1,44 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+from database.database import idempotency_keys_collection
+
+# How long a completed response is replayed for the same Idempotency-Key
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", 86400))
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+
+async def run_idempotent(scope: str, key: Optional[str], operation: Callable[[], Awaitable[dict]]) -> dict:
+    """
+    Runs operation() at most once per (scope, key) and replays its response to
+    retries. The key is claimed before the operation runs, so a retry that
+    arrives while the first attempt is still running gets a 409. A failed
+    attempt releases the key so the client can try again. Without a key the
+    operation just runs.
+    """
+    if not key:
+        return await operation()
+    if len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail="Idempotency-Key is too long")
+
+    key_id = f"{scope}:{key}"
+    try:
+        await idempotency_keys_collection.insert_one({
+            "_id": key_id,
+            "expireAt": datetime.now(timezone.utc) + timedelta(seconds=IDEMPOTENCY_KEY_TTL_SECONDS),
+        })
+    except DuplicateKeyError:
+        existing = await idempotency_keys_collection.find_one({"_id": key_id}, {"response": 1})
+        if existing and "response" in existing:
+            return existing["response"]
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+
+    try:
+        response = await operation()
+    except BaseException:
+        await idempotency_keys_collection.delete_one({"_id": key_id})
+        raise
+    await idempotency_keys_collection.update_one({"_id": key_id}, {"$set": {"response": response}})
+    return response
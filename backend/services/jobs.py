@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from database.database import dead_letter_jobs_collection
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+# Retry n waits JOB_RETRY_BASE_DELAY * 2 ** (n - 1) seconds
+JOB_RETRY_BASE_DELAY = float(os.getenv("JOB_RETRY_BASE_DELAY", 2))
+# How long stop() lets the workers finish queued jobs before cancelling them
+JOB_DRAIN_TIMEOUT_SECONDS = float(os.getenv("JOB_DRAIN_TIMEOUT_SECONDS", 10))
+
+
+# Payload values copied into dead-letter records
+DEAD_LETTER_PAYLOAD_TYPES = (str, int, float, bool, list, dict, type(None))
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help (e.g. an address that does not geocode)"""
+
+
+class JobQueue:
+    """
+    In-process background job queue with a fixed worker pool.
+    Failed jobs are retried with exponential backoff; jobs that still fail
+    (or raise PermanentJobError) are written to the dead_letter_jobs collection.
+    Jobs live in memory: stop() gives queued jobs a grace period, and anything
+    still unfinished after it is lost (see event_pipeline.ProcessingSweeper).
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_attempts: int = JOB_MAX_ATTEMPTS,
+                 retry_base_delay: float = JOB_RETRY_BASE_DELAY):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self._handlers = {}
+        self._dead_letter_hooks = {}
+        self._queue = None
+        self._tasks = []
+        self._retry_timers = {}  # job id -> TimerHandle of a retry waiting out its backoff
+        self._stopping = False
+        self.stats = {"enqueued": 0, "succeeded": 0, "retried": 0, "dead_lettered": 0}
+
+    def register(self, name: str, on_dead_letter=None):
+        """
+        Decorator registering an async handler for a job name.
+        on_dead_letter(payload, error) is awaited when a job of this name gives up.
+        """
+        def decorator(handler):
+            self._handlers[name] = handler
+            if on_dead_letter:
+                self._dead_letter_hooks[name] = on_dead_letter
+            return handler
+        return decorator
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = JOB_DRAIN_TIMEOUT_SECONDS):
+        """
+        Lets the workers finish the queued jobs for up to timeout seconds, then
+        cancels them. Retries still waiting out their backoff are not run, and
+        jobs that fail while stopping are not retried.
+        """
+        if self._queue is None:
+            return
+        self._stopping = True
+        for handle in self._retry_timers.values():
+            handle.cancel()
+        dropped = len(self._retry_timers)
+        self._retry_timers.clear()
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        dropped += self._queue.qsize()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Later enqueues fail instead of queueing jobs nothing will run
+        self._queue = None
+        if dropped:
+            logger.warning(f"Job queue stopped with {dropped} job(s) not run")
+
+    async def enqueue(self, name: str, payload: dict) -> str:
+        if name not in self._handlers:
+            raise ValueError(f"No handler registered for job {name}")
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+        job = {"id": uuid.uuid4().hex, "name": name, "payload": payload, "attempt": 0}
+        await self._queue.put(job)
+        self.stats["enqueued"] += 1
+        return job["id"]
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "workers": len(self._tasks),
+        }
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: dict):
+        job["attempt"] += 1
+        try:
+            await self._handlers[job["name"]](job["payload"])
+            self.stats["succeeded"] += 1
+        except asyncio.CancelledError:
+            raise
+        except PermanentJobError as e:
+            await self._dead_letter(job, e)
+        except Exception as e:
+            if job["attempt"] >= self.max_attempts:
+                await self._dead_letter(job, e)
+                return
+            if self._stopping:
+                logger.warning(f"Job {job['name']} ({job['id']}) failed on attempt {job['attempt']} while stopping; not retried: {e}")
+                return
+            delay = self.retry_base_delay * 2 ** (job["attempt"] - 1)
+            logger.warning(f"Job {job['name']} ({job['id']}) failed on attempt {job['attempt']}, retrying in {delay}s: {e}")
+            self.stats["retried"] += 1
+            self._retry_timers[job["id"]] = asyncio.get_running_loop().call_later(delay, self._retry, job)
+
+    def _retry(self, job: dict):
+        self._retry_timers.pop(job["id"], None)
+        self._queue.put_nowait(job)
+
+    async def _dead_letter(self, job: dict, error: Exception):
+        logger.error(f"Job {job['name']} ({job['id']}) failed permanently after {job['attempt']} attempt(s): {error}")
+        self.stats["dead_lettered"] += 1
+        try:
+            await dead_letter_jobs_collection.insert_one({
+                "job_id": job["id"],
+                "name": job["name"],
+                # Raw bytes and spooled files (uploaded images) are not worth keeping in the dead-letter store
+                "payload": {k: v for k, v in job["payload"].items() if isinstance(v, DEAD_LETTER_PAYLOAD_TYPES)},
+                "attempts": job["attempt"],
+                "error": str(error),
+                "failed_at": datetime.now(timezone.utc),
+            })
+        except Exception as e:
+            logger.error(f"Failed to record dead-letter job {job['id']}: {e}")
+
+        hook = self._dead_letter_hooks.get(job["name"])
+        if hook:
+            try:
+                await hook(job["payload"], error)
+            except Exception as e:
+                logger.error(f"Dead-letter hook for job {job['id']} failed: {e}")
+
+
+job_queue = JobQueue()
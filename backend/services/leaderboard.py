@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+from sortedcontainers import SortedList
+from database.database import volunteers_collection
+
+logger = logging.getLogger(__name__)
+
+# Each worker keeps its own copy. Points awarded in this worker show up at once,
+# changes made by other workers once the copy is rebuilt from the database.
+LEADERBOARD_REBUILD_INTERVAL_SECONDS = float(os.getenv("LEADERBOARD_REBUILD_INTERVAL_SECONDS", 300))
+
+LEADERBOARD_PROJECTION = {
+    "first_name": 1,
+    "last_name": 1,
+    "points": 1,
+    # Volunteers not yet migrated fall back to the array length, computed server side
+    "events_attended": {"$ifNull": ["$events_attended", {"$size": {"$ifNull": ["$attended_events", []]}}]},
+}
+
+
+def _display_name(volunteer: dict) -> str:
+    return f"{volunteer.get('first_name', '')} {volunteer.get('last_name', '')}".strip()
+
+
+class Leaderboard:
+    """
+    Volunteers ranked by points in a sorted list keyed on (-points, volunteer_id),
+    so top-N, a volunteer's rank and the volunteers around them are all
+    O(log n) lookups. Volunteers with equal points share a rank.
+    """
+
+    def __init__(self, interval: float = LEADERBOARD_REBUILD_INTERVAL_SECONDS):
+        self.interval = interval
+        self._ranked = SortedList()
+        self._entries = {}  # volunteer_id -> (points, name, events_attended)
+        self._pending = None  # updates made while a rebuild is reading the collection
+        self._task = None
+        self.rebuilt_at = None
+
+    def _apply(self, entries: dict, ranked: SortedList, volunteer_id: str, entry: Optional[tuple]):
+        previous = entries.pop(volunteer_id, None)
+        if previous is not None:
+            ranked.remove((-previous[0], volunteer_id))
+        if entry is not None:
+            entries[volunteer_id] = entry
+            ranked.add((-entry[0], volunteer_id))
+
+    def _update(self, volunteer_id: str, entry: Optional[tuple]):
+        self._apply(self._entries, self._ranked, volunteer_id, entry)
+        if self._pending is not None:
+            self._pending.append((volunteer_id, entry))
+
+    def set(self, volunteer: dict):
+        """Adds or refreshes a volunteer from their (updated) document"""
+        self._update(str(volunteer["_id"]), (
+            volunteer.get("points", 0),
+            _display_name(volunteer),
+            volunteer.get("events_attended", 0),
+        ))
+
+    def remove(self, volunteer_id: str):
+        self._update(str(volunteer_id), None)
+
+    async def rebuild(self):
+        entries, ranked = {}, SortedList()
+        self._pending = []
+        try:
+            async for volunteer in volunteers_collection.find({}, LEADERBOARD_PROJECTION):
+                volunteer_id = str(volunteer["_id"])
+                entries[volunteer_id] = (volunteer.get("points", 0), _display_name(volunteer), volunteer.get("events_attended", 0))
+                ranked.add((-entries[volunteer_id][0], volunteer_id))
+            # The scan may have read a document before an update made during it
+            for volunteer_id, entry in self._pending:
+                self._apply(entries, ranked, volunteer_id, entry)
+        finally:
+            self._pending = None
+        self._entries, self._ranked = entries, ranked
+        self.rebuilt_at = time.time()
+
+    def _rows(self, start: int, stop: int, current: Optional[str] = None) -> list:
+        rows = []
+        for index in range(max(start, 0), min(stop, len(self._ranked))):
+            negative_points, volunteer_id = self._ranked[index]
+            if rows and rows[-1]["points"] == -negative_points:
+                rank = rows[-1]["rank"]
+            else:
+                rank = self._ranked.bisect_left((negative_points,)) + 1
+            points, name, events_attended = self._entries[volunteer_id]
+            row = {"rank": rank, "name": name, "points": points, "events_attended": events_attended}
+            if current is not None:
+                row["is_current_user"] = volunteer_id == current
+            rows.append(row)
+        return rows
+
+    def top(self, limit: int) -> list:
+        return self._rows(0, limit)
+
+    def rank(self, volunteer_id: str) -> Optional[int]:
+        entry = self._entries.get(str(volunteer_id))
+        if entry is None:
+            return None
+        return self._ranked.bisect_left((-entry[0],)) + 1
+
+    def around(self, volunteer_id: str, radius: int) -> list:
+        """The volunteer's row with up to radius rows above and below it"""
+        entry = self._entries.get(str(volunteer_id))
+        if entry is None:
+            return []
+        index = self._ranked.index((-entry[0], str(volunteer_id)))
+        return self._rows(index - radius, index + radius + 1, current=str(volunteer_id))
+
+    def __len__(self):
+        return len(self._ranked)
+
+    async def start(self):
+        try:
+            await self.rebuild()
+        except Exception as e:
+            logger.error(f"Leaderboard build failed at startup: {e}")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.rebuild()
+            except Exception as e:
+                logger.error(f"Leaderboard rebuild failed: {e}")
+
+
+leaderboard = Leaderboard()
@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import os
+import smtplib
+import threading
+import time
+from datetime import datetime, timezone
+from email.message import Message
+from database.database import dead_letter_jobs_collection
+
+logger = logging.getLogger(__name__)
+
+# SMTP connections kept open per worker, and how long an idle one is trusted without a NOOP
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 2))
+SMTP_KEEPALIVE_SECONDS = float(os.getenv("SMTP_KEEPALIVE_SECONDS", 30))
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", 30))
+
+# Outbox batching: up to MAIL_BATCH_SIZE messages per SMTP session, waiting at most MAIL_BATCH_LINGER seconds
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", 20))
+MAIL_BATCH_LINGER = float(os.getenv("MAIL_BATCH_LINGER", 0.5))
+MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", 3))
+
+# Errors that reject a single message; the session itself is still usable
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+# Anything else (smtplib.SMTPException is an OSError) drops the connection and a fresh one is tried
+RECONNECT_ERRORS = (OSError,)
+
+
+class SMTPConnectionPool:
+    """
+    Keeps authenticated SMTP sessions open between sends.
+    smtplib is blocking, so callers on the event loop go through MailOutbox
+    (or asyncio.to_thread) rather than calling this directly.
+    """
+
+    def __init__(self, host: str, port: int, username: str = None, password: str = None,
+                 use_tls: bool = True, size: int = SMTP_POOL_SIZE, timeout: float = SMTP_TIMEOUT,
+                 keepalive: float = SMTP_KEEPALIVE_SECONDS):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.keepalive = keepalive
+        self.size = size
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = []  # (connection, last_used)
+        self.stats = {"connections_opened": 0, "reconnects": 0, "sent": 0, "failed": 0}
+
+    @classmethod
+    def from_env(cls) -> "SMTPConnectionPool":
+        """Builds a pool from the same EMAIL_* settings EmailService uses"""
+        return cls(
+            host=os.getenv("EMAIL_HOST", "smtp.gmail.com"),
+            port=int(os.getenv("EMAIL_PORT", 587)),
+            username=os.getenv("EMAIL_USER"),
+            password=os.getenv("EMAIL_PASSWORD"),
+            use_tls=os.getenv("EMAIL_USE_TLS", "true").lower() != "false",
+        )
+
+    def _open(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.username and self.password:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        with self._lock:
+            self.stats["connections_opened"] += 1
+        return server
+
+    @staticmethod
+    def _discard(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _checkout(self) -> smtplib.SMTP:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, last_used = self._idle.pop()
+            if time.monotonic() - last_used < self.keepalive:
+                return server
+            # Idle for a while: make sure the server has not dropped us
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except Exception:
+                pass
+            self._discard(server)
+        return self._open()
+
+    def _checkin(self, server: smtplib.SMTP):
+        with self._lock:
+            self._idle.append((server, time.monotonic()))
+
+    def send_many(self, messages: list) -> list:
+        """
+        Sends messages over one session, reconnecting once per message if the
+        connection drops. Returns a list of booleans, one per message.
+        """
+        results = []
+        with self._slots:
+            server = None
+            try:
+                for message in messages:
+                    for attempt in range(2):
+                        try:
+                            if server is None:
+                                server = self._checkout()
+                            server.send_message(message)
+                            results.append(True)
+                            break
+                        except MESSAGE_ERRORS as e:
+                            logger.error(f"SMTP error sending email to {message['To']}: {e}")
+                            results.append(False)
+                            break
+                        except RECONNECT_ERRORS as e:
+                            if server is not None:
+                                self._discard(server)
+                                server = None
+                            if attempt == 1:
+                                logger.error(f"SMTP error sending email to {message['To']}: {e}")
+                                results.append(False)
+                            else:
+                                with self._lock:
+                                    self.stats["reconnects"] += 1
+            finally:
+                if server is not None:
+                    self._checkin(server)
+        with self._lock:
+            self.stats["sent"] += results.count(True)
+            self.stats["failed"] += results.count(False)
+        return results
+
+    def send(self, message: Message) -> bool:
+        return self.send_many([message])[0]
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._discard(server)
+
+
+class MailOutbox:
+    """
+    Async outbox in front of the SMTP pool. Request handlers put messages here
+    and return immediately; one drain task per pooled connection takes batches
+    off the queue and sends each over a single SMTP session in a worker thread.
+    """
+
+    def __init__(self, batch_size: int = MAIL_BATCH_SIZE, linger: float = MAIL_BATCH_LINGER,
+                 max_attempts: int = MAIL_MAX_ATTEMPTS):
+        self.batch_size = batch_size
+        self.linger = linger
+        self.max_attempts = max_attempts
+        self.transport = None
+        self._queue = None
+        self._tasks = []
+
+    async def start(self, transport: SMTPConnectionPool):
+        self.transport = transport
+        self._queue = asyncio.Queue()
+        # A drainer per connection, so batches go out in parallel up to the pool size
+        self._tasks = [asyncio.create_task(self._drain()) for _ in range(transport.size)]
+
+    async def stop(self):
+        """Flushes whatever is queued, then closes the pooled connections"""
+        if not self._tasks:
+            return
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        pending = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        if pending:
+            await self._send_batch(pending, requeue=False)
+        await asyncio.to_thread(self.transport.close)
+
+    def submit(self, message: Message) -> bool:
+        """Queues a message for delivery. Must be called from the event loop."""
+        if self._queue is None:
+            logger.error(f"Mail outbox is not running; dropping email to {message['To']}")
+            return False
+        self._queue.put_nowait((message, 0))
+        return True
+
+    def snapshot(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            **(self.transport.stats if self.transport else {}),
+        }
+
+    async def _drain(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = asyncio.get_running_loop().time() + self.linger
+            while len(batch) < self.batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._send_batch(batch)
+
+    async def _send_batch(self, batch: list, requeue: bool = True):
+        try:
+            results = await asyncio.to_thread(self.transport.send_many, [message for message, _ in batch])
+        except Exception as e:
+            logger.error(f"Failed to send email batch: {e}")
+            results = [False] * len(batch)
+
+        for (message, attempts), sent in zip(batch, results):
+            if sent:
+                logger.info(f"Email sent successfully to {message['To']}")
+                continue
+            if requeue and attempts + 1 < self.max_attempts:
+                # Back off before retrying so a down SMTP server is not hammered
+                asyncio.get_running_loop().call_later(2 ** attempts, self._queue.put_nowait, (message, attempts + 1))
+            else:
+                await self._dead_letter(message, attempts + 1)
+
+    async def _dead_letter(self, message: Message, attempts: int):
+        logger.error(f"Giving up on email to {message['To']} after {attempts} attempt(s)")
+        try:
+            await dead_letter_jobs_collection.insert_one({
+                "name": "email",
+                "payload": {"to": message["To"], "subject": message["Subject"]},
+                "attempts": attempts,
+                "error": "SMTP delivery failed",
+                "failed_at": datetime.now(timezone.utc),
+            })
+        except Exception as e:
+            logger.error(f"Failed to record undelivered email: {e}")
+
+
+mail_outbox = MailOutbox()
@@ -0,0 +1,62 @@
+import base64
+from typing import Optional
+from bson import json_util
+from fastapi import HTTPException
+
+# Largest page a client can ask for in one request
+MAX_PAGE_SIZE = 200
+
+# Header carrying the cursor for the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(position: dict) -> str:
+    """Encodes the sort-key values of the last item into an opaque cursor"""
+    # json_util keeps datetimes and ObjectIds round-trippable
+    raw = json_util.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Decodes a cursor produced by encode_cursor, rejecting anything malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(position, dict):
+            raise ValueError("cursor is not an object")
+        return position
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def keyset_filter(sort_keys: list, after: Optional[str]) -> dict:
+    """
+    Builds the filter that resumes an ascending multi-key sort after the cursor.
+    For keys (a, b) this is: a > A or (a == A and b > B).
+    """
+    if not after:
+        return {}
+    position = decode_cursor(after)
+    if any(key not in position for key in sort_keys):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+    clauses = []
+    for i, key in enumerate(sort_keys):
+        clause = {prev: position[prev] for prev in sort_keys[:i]}
+        clause[key] = {"$gt": position[key]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+def parse_fields(fields: Optional[str], allowed: set, required: list) -> Optional[list]:
+    """
+    Parses a comma separated fields= parameter into a list of field names.
+    The required fields (the sort keys) are always included.
+    """
+    if not fields or not fields.strip():
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(required + requested))
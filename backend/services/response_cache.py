@@ -0,0 +1,289 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Optional
+from urllib.parse import urlencode
+from fastapi import Request
+from fastapi.responses import Response
+from services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() != "false"
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 30))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 1000))
+# Set to a redis:// URL to share the cache (and invalidations) across workers
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL")
+
+# Response headers worth replaying from the cache
+CACHED_HEADERS = ("x-next-cursor",)
+
+# Invalidation namespaces
+EVENTS_NAMESPACE = "events"  # event listings and dashboard views
+
+
+def event_namespace(event_id: int) -> str:
+    return f"event:{event_id}"
+
+
+class MemoryBackend:
+    """
+    Per-worker LRU with TTL. Invalidation only reaches this worker; other
+    workers serve their copy until it expires.
+    """
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL_SECONDS):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations = {}
+
+    async def get_generations(self, namespaces: list) -> list:
+        return [self._generations.get(namespace, 0) for namespace in namespaces]
+
+    async def bump(self, namespaces: list):
+        for namespace in namespaces:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    async def get(self, key: str):
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: tuple, ttl: float):
+        self._entries.set(key, value, ttl)
+
+    async def aclose(self):
+        self._entries.clear()
+
+
+class RedisBackend:
+    """
+    Redis (or any server speaking its protocol, e.g. a local Valkey) shared by
+    all workers, so an invalidation in one worker is seen by every other.
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_URL is set but the redis package is not installed")
+        self._redis = redis.from_url(url)
+
+    async def get_generations(self, namespaces: list) -> list:
+        values = await self._redis.mget([f"cache-gen:{namespace}" for namespace in namespaces])
+        return [int(value or 0) for value in values]
+
+    async def bump(self, namespaces: list):
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for namespace in namespaces:
+                pipe.incr(f"cache-gen:{namespace}")
+            await pipe.execute()
+
+    async def get(self, key: str):
+        raw = await self._redis.hgetall(f"cache:{key}")
+        if not raw:
+            return None
+        headers = {k.decode(): v.decode() for k, v in raw.items() if k != b"body"}
+        return raw[b"body"], headers
+
+    async def set(self, key: str, value: tuple, ttl: float):
+        body, headers = value
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.delete(f"cache:{key}")
+            pipe.hset(f"cache:{key}", mapping={"body": body, **headers})
+            pipe.expire(f"cache:{key}", max(1, int(ttl)))
+            await pipe.execute()
+
+    async def aclose(self):
+        await self._redis.aclose()
+
+
+class ResponseCache:
+    """
+    Caches successful JSON responses of public read endpoints.
+    Keys are the path plus sorted query parameters, prefixed with the current
+    generation of every namespace the response depends on; invalidating a
+    namespace bumps its generation, so stale entries are never read again and
+    simply age out.
+    """
+
+    def __init__(self, backend=None, ttl: float = RESPONSE_CACHE_TTL_SECONDS, enabled: bool = RESPONSE_CACHE_ENABLED):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "errors": 0}
+
+    def _get_backend(self):
+        if self.backend is None:
+            self.backend = RedisBackend(RESPONSE_CACHE_URL) if RESPONSE_CACHE_URL else MemoryBackend()
+        return self.backend
+
+    async def cached(self, request: Request, namespaces: list,
+                     produce: Callable[[], Awaitable[Response]], ttl: Optional[float] = None,
+                     version=None) -> Response:
+        """
+        Returns the cached response for this request, or calls produce() and caches its result.
+        Pass the version an ETag is built from: it becomes part of the key, so a body
+        cached by a worker that missed an invalidation is never served under a newer ETag.
+        Read the version before producing the body, so the body is never older than it.
+        """
+        if not self.enabled:
+            return await produce()
+
+        backend = self._get_backend()
+        query = urlencode(sorted(request.query_params.multi_items()))
+        key = None
+        try:
+            generations = await backend.get_generations(namespaces)
+            key = ":".join(f"{n}@{g}" for n, g in zip(namespaces, generations)) + f"|{request.url.path}?{query}"
+            if version is not None:
+                key += f"|v{version}"
+            entry = await backend.get(key)
+        except Exception as e:
+            logger.error(f"Response cache read failed: {e}")
+            self.stats["errors"] += 1
+            entry = None
+
+        if entry is not None:
+            self.stats["hits"] += 1
+            body, headers = entry
+            return Response(content=body, media_type="application/json", headers={**headers, "X-Cache": "HIT"})
+
+        self.stats["misses"] += 1
+        response = await produce()
+        if key is not None and response.status_code == 200:
+            headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+            try:
+                await backend.set(key, (bytes(response.body), headers), self.ttl if ttl is None else ttl)
+            except Exception as e:
+                logger.error(f"Response cache write failed: {e}")
+                self.stats["errors"] += 1
+        response.headers["X-Cache"] = "MISS"
+        return response
+
+    async def invalidate(self, *namespaces: str):
+        if not self.enabled or not namespaces:
+            return
+        try:
+            await self._get_backend().bump(list(namespaces))
+            self.stats["invalidations"] += 1
+        except Exception as e:
+            logger.error(f"Response cache invalidation failed for {namespaces}: {e}")
+            self.stats["errors"] += 1
+
+    def snapshot(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_ratio": round(self.stats["hits"] / lookups, 3) if lookups else None,
+            "backend": type(self._get_backend()).__name__ if self.enabled else None,
+            "ttl": self.ttl,
+        }
+
+    async def aclose(self):
+        if self.backend is not None:
+            await self.backend.aclose()
+            self.backend = None
+
+
+response_cache = ResponseCache()
+
+
+async def _bench(requests: int, concurrency: int, events: int, write_every: int, db_name: str):
+    """
+    Load test of the public read endpoints with the response cache off and on.
+    Every write_every-th request is a write (an event invalidation) instead of a
+    read. Runs the app in-process against a scratch database seeded with events.
+    """
+    import random
+    import statistics
+    import httpx
+    from database import database
+    from database.database import events_collection
+    from database.indexes import INDEXES
+    from main import app
+    from services.stats import reconcile
+    # Under python -m this module is __main__; the routes use the imported instance
+    from services.response_cache import response_cache
+    from services.versioning import mark_events_changed
+
+    if db_name == database.DB_NAME:
+        raise SystemExit("Refusing to seed and drop the application database; pass another --db")
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    rng = random.Random(7)
+    paths = ["/events?limit=50", "/dashboard/upcoming", "/dashboard/causes"]
+    database.connect(db_name)
+    try:
+        await events_collection.create_indexes(INDEXES[events_collection.name])
+        await events_collection.insert_many([{
+            "event_id": event_id, "event_name": f"Event {event_id}", "organization": "PledgeIt",
+            "description": "Volunteers needed " * 10, "category": rng.choice(["Environment", "Education", "Health"]),
+            "date": f"{2020 + event_id % 20}-06-01", "time": "09:00:00", "venue": "Town Hall", "city": "Colombo",
+            "address": "Main Street", "latitude": None, "longitude": None, "duration": "3 hours",
+            "volunteer_requirements": 20, "skills_required": ["Teamwork"], "contact_email": "events@pledgeit.lk",
+            "contact_person": {"name": "Organizer", "contact_number": "0770000000"},
+            "image_url": "https://example.com/event.png", "registration_deadline": "2019-12-30",
+            "additional_notes": "", "status": "Open", "total_registered_volunteers": 0,
+            "created_at": "2019-12-01T00:00:00", "expireAt": "2040-01-02T00:00:00", "processing_status": "ready",
+        } for event_id in range(1, events + 1)])
+        await reconcile()
+
+        async def run(enabled: bool) -> dict:
+            response_cache.enabled = enabled
+            response_cache.stats = {name: 0 for name in response_cache.stats}
+            gate = asyncio.Semaphore(concurrency)
+            latencies, failures = [], 0
+
+            async def request(n: int):
+                nonlocal failures
+                async with gate:
+                    event_id = rng.randint(1, events)
+                    if n % write_every == 0:
+                        await mark_events_changed(event_id)
+                        return
+                    path = rng.choice(paths) if n % 2 else f"/events/{event_id}"
+                    start = time.perf_counter()
+                    response = await client.get(path)
+                    latencies.append(time.perf_counter() - start)
+                    failures += response.status_code != 200
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                start = time.perf_counter()
+                await asyncio.gather(*(request(n) for n in range(1, requests + 1)))
+                elapsed = time.perf_counter() - start
+            cuts = statistics.quantiles(latencies, n=100)
+            return {
+                "requests/s": round(requests / elapsed, 1),
+                "p50_ms": round(cuts[49] * 1000, 2),
+                "p95_ms": round(cuts[94] * 1000, 2),
+                "p99_ms": round(cuts[98] * 1000, 2),
+                "failed": failures,
+                "hit_ratio": response_cache.snapshot()["hit_ratio"] if enabled else None,
+            }
+
+        uncached = await run(False)
+        cached = await run(True)
+        print(f"{requests} requests ({concurrency} concurrent, 1 in {write_every} a write) over {events} events")
+        print(f"backend: {type(response_cache._get_backend()).__name__}")
+        print(f"cache off: {uncached}")
+        print(f"cache on:  {cached}")
+        print(f"p99 improvement: {uncached['p99_ms'] / cached['p99_ms']:.1f}x")
+    finally:
+        await response_cache.aclose()
+        await database.client.drop_database(db_name)
+        await database.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Response cache load test against MONGO_URI (set RESPONSE_CACHE_URL to test the Redis backend)"
+    )
+    parser.add_argument("-n", "--requests", type=int, default=5000)
+    parser.add_argument("-c", "--concurrency", type=int, default=50)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("-w", "--write-every", type=int, default=50)
+    parser.add_argument("--db", default="pledgeit_bench", help="scratch database, dropped afterwards")
+    args = parser.parse_args()
+    asyncio.run(_bench(args.requests, args.concurrency, args.events, args.write_every, args.db))
@@ -0,0 +1,37 @@
+import re
+import unicodedata
+
+# Default number of autocomplete suggestions
+AUTOCOMPLETE_LIMIT = 10
+
+
+def normalize_text(value: str) -> str:
+    """
+    Lowercases, strips accents and collapses whitespace.
+    Used for the event_name_normalized field and for prefix lookups against it,
+    so both sides are compared in the same form.
+    """
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.lower().split())
+
+
+def prefix_filter(field: str, prefix: str) -> dict:
+    """
+    Case-sensitive anchored regex on an already-normalized field.
+    An anchored, case-sensitive pattern is the form MongoDB can answer with an
+    index range scan instead of a collection scan.
+    """
+    return {field: {"$regex": "^" + re.escape(normalize_text(prefix))}}
+
+
+def contains_filter(value: str) -> dict:
+    """Case-insensitive substring match on user input, with regex metacharacters escaped"""
+    return {"$regex": re.escape(value.strip()), "$options": "i"}
+
+
+def text_search_filter(search: str) -> dict:
+    """Full-text query against the events text index"""
+    return {"$search": search.strip()}
@@ -0,0 +1,104 @@
+import datetime
+import time
+from typing import List, Optional
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from models.models import Event
+
+# Only the fields an Event response needs; location, search helpers and
+# version fields stay in Mongo
+EVENT_PROJECTION = {field: 1 for field in Event.model_fields}
+
+# Validate once in pydantic-core and encode straight to JSON bytes, instead of
+# building Event instances, running jsonable_encoder and then json.dumps
+event_adapter = TypeAdapter(Event)
+event_list_adapter = TypeAdapter(List[Event])
+
+
+def event_serializer(event) -> dict:
+    """Serializes event data from MongoDB to API response format"""
+    try:
+        volunteer_requirements = str(event.get("volunteer_requirements", ""))
+        expire_at = event.get("expireAt")
+        if isinstance(expire_at, datetime.datetime):
+            expire_at = expire_at.isoformat()
+    except Exception:
+        volunteer_requirements = ""
+        expire_at = ""
+
+    return {
+        "event_id": event.get("event_id"),
+        "event_name": event.get("event_name"),
+        "organization": event.get("organization"),
+        "description": event.get("description"),
+        "category": event.get("category"),
+        "date": event.get("date"),
+        "time": event.get("time"),
+        "venue": event.get("venue"),
+        "city": event.get("city"),
+        "address": event.get("address"),
+        "latitude": event.get("latitude"),
+        "longitude": event.get("longitude"),
+        "duration": event.get("duration"),
+        "volunteer_requirements": volunteer_requirements,
+        "skills_required": event.get("skills_required", []),
+        "contact_email": event.get("contact_email"),
+        "contact_person": event.get("contact_person"),
+        "image_url": event.get("image_url"),
+        "registration_deadline": event.get("registration_deadline"),
+        "additional_notes": event.get("additional_notes") or "",
+        "status": event.get("status"),
+        "total_registered_volunteers": event.get("total_registered_volunteers", 0),
+        "created_at": event.get("created_at"),
+        "expireAt": expire_at,
+        "processing_status": event.get("processing_status")
+    }
+
+
+def event_to_json(event) -> bytes:
+    return event_adapter.dump_json(event_adapter.validate_python(event_serializer(event)))
+
+
+def events_to_json(events, fields: Optional[list] = None) -> bytes:
+    """Encodes raw event documents as a JSON array; fields= limits (and skips validating) the output"""
+    if fields:
+        return to_json([
+            {key: value for key, value in event_serializer(event).items() if key in fields}
+            for event in events
+        ])
+    return event_list_adapter.dump_json(event_list_adapter.validate_python([event_serializer(event) for event in events]))
+
+
+def events_json_response(events, headers: dict = None, fields: Optional[list] = None) -> Response:
+    return Response(content=events_to_json(events, fields), media_type="application/json", headers=headers)
+
+
+def _bench(sizes: list):
+    """Compares per-event cost of the old Event(**...) + jsonable_encoder + json.dumps path with events_to_json"""
+    import json
+    from fastapi.encoders import jsonable_encoder
+
+    document = {
+        "event_id": 1, "event_name": "Beach Cleanup", "organization": "PledgeIt", "description": "Cleaning up " * 30,
+        "category": "Environmental", "date": "2025-01-01", "time": "09:00:00", "venue": "Beach", "city": "Colombo",
+        "address": "Galle Face", "latitude": 6.92, "longitude": 79.84, "duration": "3 hours",
+        "volunteer_requirements": 20, "skills_required": ["Teamwork"], "contact_email": "org@example.com",
+        "contact_person": {"name": "Organizer", "contact_number": "0770000000"}, "image_url": "https://example.com/a.png",
+        "registration_deadline": "2024-12-30", "additional_notes": "", "status": "Open",
+        "total_registered_volunteers": 5, "created_at": "2024-12-01T00:00:00", "expireAt": datetime.datetime(2025, 1, 2),
+        "processing_status": "ready",
+    }
+    for size in sizes:
+        events = [dict(document, event_id=i) for i in range(size)]
+        start = time.perf_counter()
+        json.dumps(jsonable_encoder([Event(**event_serializer(event)) for event in events]))
+        old = time.perf_counter() - start
+        start = time.perf_counter()
+        events_to_json(events)
+        new = time.perf_counter() - start
+        print(f"{size} events: old {old / size * 1e6:.1f} us/event, new {new / size * 1e6:.1f} us/event ({old / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    _bench([1000, 10000])
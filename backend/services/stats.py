@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from database.database import (
+    events_collection,
+    volunteers_collection,
+    organizations_collection,
+    stats_collection,
+)
+from services.versioning import mark_events_changed
+
+logger = logging.getLogger(__name__)
+
+# How often the counters are recomputed from the source collections. This also
+# catches changes that bypass the API, like TTL-expired events.
+STATS_RECONCILE_INTERVAL_SECONDS = float(os.getenv("STATS_RECONCILE_INTERVAL_SECONDS", 600))
+
+DASHBOARD_STATS_ID = "dashboard"
+
+USER_COUNTERS = {
+    "volunteer": "total_volunteers",
+    "organization": "total_organizations",
+}
+
+
+def _category_key(category: str) -> str:
+    # Field names cannot contain "." or start with "$", so swap in their full-width forms
+    return category.replace(".", "．").replace("$", "＄")
+
+
+def _category_name(key: str) -> str:
+    return key.replace("．", ".").replace("＄", "$")
+
+
+async def _increment(counters: dict):
+    """Applies one atomic $inc to the stats document; failures are logged, never raised"""
+    counters = {field: amount for field, amount in counters.items() if amount}
+    if not counters:
+        return
+    try:
+        await stats_collection.update_one({"_id": DASHBOARD_STATS_ID}, {"$inc": counters}, upsert=True)
+    except Exception as e:
+        logger.error(f"Failed to update dashboard stats {counters}: {e}")
+
+
+async def record_event_created(category: str):
+    counters = {"total_events": 1}
+    if category:
+        counters[f"events_by_category.{_category_key(category)}"] = 1
+    await _increment(counters)
+
+
+async def record_events_created(categories: list):
+    """Counts a batch of new events (e.g. an import) in one update"""
+    counters = {"total_events": len(categories)}
+    for category in categories:
+        if category:
+            key = f"events_by_category.{_category_key(category)}"
+            counters[key] = counters.get(key, 0) + 1
+    await _increment(counters)
+
+
+async def record_event_deleted(category: str):
+    counters = {"total_events": -1}
+    if category:
+        counters[f"events_by_category.{_category_key(category)}"] = -1
+    await _increment(counters)
+
+
+async def record_event_recategorized(old_category: str, new_category: str):
+    if old_category == new_category:
+        return
+    counters = {}
+    if old_category:
+        counters[f"events_by_category.{_category_key(old_category)}"] = -1
+    if new_category:
+        counters[f"events_by_category.{_category_key(new_category)}"] = 1
+    await _increment(counters)
+
+
+async def record_user_created(role: str):
+    await _increment({USER_COUNTERS[role]: 1})
+
+
+async def record_user_deleted(role: str):
+    await _increment({USER_COUNTERS[role]: -1})
+
+
+async def _count_events_by_category() -> dict:
+    cursor = await events_collection.aggregate([
+        {"$group": {"_id": "$category", "value": {"$sum": 1}}},
+    ])
+    return {row["_id"]: row["value"] for row in await cursor.to_list(None) if row["_id"]}
+
+
+def _flatten(stats: dict) -> dict:
+    """Stats document as {counter field path: value}, the form $inc takes"""
+    counters = {field: stats.get(field, 0) for field in ("total_events", "total_volunteers", "total_organizations")}
+    for key, value in (stats.get("events_by_category") or {}).items():
+        counters[f"events_by_category.{key}"] = value
+    return counters
+
+
+async def reconcile() -> dict:
+    """
+    Recomputes every counter from the source collections and applies the
+    difference from the stored value with $inc, so increments that land while
+    the counts run are kept rather than overwritten. An event created between
+    reading the stats and counting is counted twice until the next run.
+
+    Every worker runs this, so runs overlap. The difference only applies if no
+    other run has written since the stats were read (reconcile_run unchanged);
+    a run that loses skips its write rather than adding the difference again.
+    """
+    observed = await stats_collection.find_one({"_id": DASHBOARD_STATS_ID}) or {}
+    by_category, total_events, total_volunteers, total_organizations = await asyncio.gather(
+        _count_events_by_category(),
+        events_collection.count_documents({}),
+        volunteers_collection.count_documents({}),
+        organizations_collection.count_documents({}),
+    )
+    computed = _flatten({
+        "total_events": total_events,
+        "total_volunteers": total_volunteers,
+        "total_organizations": total_organizations,
+        "events_by_category": {_category_key(category): value for category, value in by_category.items()},
+    })
+    current = _flatten(observed)
+    deltas = {
+        field: computed.get(field, 0) - current.get(field, 0)
+        for field in computed.keys() | current.keys()
+        if computed.get(field, 0) != current.get(field, 0)
+    }
+
+    update = {"$set": {"reconciled_at": datetime.now(timezone.utc)}, "$inc": {**deltas, "reconcile_run": 1}}
+    # $exists rather than None, which an upsert would copy into the new document
+    run = observed.get("reconcile_run", {"$exists": False})
+    try:
+        stats = await stats_collection.find_one_and_update(
+            {"_id": DASHBOARD_STATS_ID, "reconcile_run": run},
+            update, upsert=True, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # Another run wrote first, so the upsert tried to insert a second stats document
+        stats = None
+    if stats is None:
+        logger.info("Dashboard stats were reconciled by another run; skipping")
+        return await stats_collection.find_one({"_id": DASHBOARD_STATS_ID})
+    # Events removed outside the API (TTL expiry) must still drop out of cached lists and ETags
+    if observed and deltas.get("total_events"):
+        await mark_events_changed()
+    return stats
+
+
+async def get_dashboard_stats() -> dict:
+    """Returns the stats document, building it on first use"""
+    stats = await stats_collection.find_one({"_id": DASHBOARD_STATS_ID})
+    if stats is None or "reconciled_at" not in stats:
+        stats = await reconcile()
+    return {
+        "total_events": stats.get("total_events", 0),
+        "total_volunteers": stats.get("total_volunteers", 0),
+        "total_organizations": stats.get("total_organizations", 0),
+        "events_by_category": {
+            _category_name(key): value
+            for key, value in stats.get("events_by_category", {}).items()
+            if value > 0
+        },
+    }
+
+
+class StatsReconciler:
+    """Background task that runs reconcile() every interval seconds"""
+
+    def __init__(self, interval: float = STATS_RECONCILE_INTERVAL_SECONDS):
+        self.interval = interval
+        self._task = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await reconcile()
+            except Exception as e:
+                logger.error(f"Dashboard stats reconciliation failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+stats_reconciler = StatsReconciler()
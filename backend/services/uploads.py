@@ -0,0 +1,292 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import cloudinary
+import cloudinary.uploader
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from PIL import Image, ImageOps
+from database.database import uploads_collection
+
+logger = logging.getLogger(__name__)
+
+# Uploads larger than this are rejected while they are read, before any processing
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 10 * 1024 * 1024))
+# Uploads stay in memory up to this size, larger ones spill to a temp file
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", 1024 * 1024))
+UPLOAD_CHUNK_BYTES = 64 * 1024
+# Cap on any request body, enforced as it arrives: multipart forms are parsed
+# (and spooled to disk) before a route runs, so the per-file check comes too late
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", MAX_UPLOAD_BYTES + 1024 * 1024))
+
+# Images are scaled down to fit IMAGE_MAX_DIMENSION and re-encoded before upload
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", 1600))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", 85))
+# Pillow releases the GIL while decoding and resizing, so threads run in parallel
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", os.cpu_count() or 1))
+
+# "cloudinary", or "local" to write into the uploads/ directory main.py serves
+UPLOAD_STORAGE = os.getenv("UPLOAD_STORAGE", "cloudinary")
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+# Prefix for local upload URLs, e.g. https://api.example.com (relative when empty)
+UPLOAD_BASE_URL = os.getenv("UPLOAD_BASE_URL", "")
+
+# Reject images that would decode to more pixels than this (decompression bombs)
+Image.MAX_IMAGE_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", 50_000_000))
+
+
+class InvalidImageError(ValueError):
+    """The upload is not an image Pillow can read"""
+
+
+class SpooledUpload:
+    """An upload copied to a spooled temp file, with its size and sha256 taken on the way"""
+
+    def __init__(self, file, size: int, sha256: str, filename: str):
+        self.file = file
+        self.size = size
+        self.sha256 = sha256
+        self.filename = filename
+
+    def close(self):
+        self.file.close()
+
+
+def _too_large(max_bytes: int) -> str:
+    return f"Request is larger than {max_bytes // (1024 * 1024)} MB"
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Rejects request bodies over max_bytes with a 413. A declared Content-Length
+    is checked before anything is read; otherwise the body is counted as it
+    streams in and reading stops at the first chunk past the limit.
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = JSONResponse({"detail": _too_large(self.max_bytes)}, status_code=413)
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body parsing, so this becomes the response
+                    raise HTTPException(status_code=413, detail=_too_large(self.max_bytes))
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def verify_image(file):
+    """Checks that a file is an image Pillow can read, without decoding the pixels"""
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            image.verify()
+    except Image.DecompressionBombError:
+        raise InvalidImageError("Image dimensions are too large")
+    except (OSError, SyntaxError, ValueError):
+        raise InvalidImageError("File is not a valid image")
+    finally:
+        file.seek(0)
+
+
+class CloudinaryStorage:
+    name = "cloudinary"
+
+    def _upload(self, data: bytes, folder: str, public_id: str) -> str:
+        cloudinary.config(
+            cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+            api_key=os.getenv("CLOUDINARY_API_KEY"),
+            api_secret=os.getenv("CLOUDINARY_API_SECRET")
+        )
+        result = cloudinary.uploader.upload(
+            data, folder=folder, public_id=public_id, overwrite=False, resource_type="image"
+        )
+        return result["secure_url"]
+
+    async def save(self, data: bytes, folder: str, name: str, extension: str) -> str:
+        return await asyncio.to_thread(self._upload, data, folder, name)
+
+
+class LocalStorage:
+    """Writes into UPLOAD_DIR, which main.py serves under /uploads"""
+    name = "local"
+
+    def __init__(self, root: str = UPLOAD_DIR, base_url: str = UPLOAD_BASE_URL):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    def _write(self, data: bytes, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so a reader never sees a half-written file
+        with open(path + ".part", "wb") as file:
+            file.write(data)
+        os.replace(path + ".part", path)
+
+    async def save(self, data: bytes, folder: str, name: str, extension: str) -> str:
+        filename = f"{name}.{extension}"
+        await asyncio.to_thread(self._write, data, os.path.join(self.root, folder, filename))
+        return f"{self.base_url}/uploads/{folder}/{filename}"
+
+
+STORAGE_BACKENDS = {"cloudinary": CloudinaryStorage, "local": LocalStorage}
+
+
+def prepare_image(file, max_dimension: int = IMAGE_MAX_DIMENSION, quality: int = IMAGE_JPEG_QUALITY):
+    """Scales an image down to fit max_dimension and re-encodes it; returns (bytes, extension)"""
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            # For JPEGs this decodes straight at a reduced scale, which is much cheaper
+            image.draft("RGB", (max_dimension, max_dimension))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+            output = io.BytesIO()
+            if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+                image.save(output, "PNG", optimize=True)
+                return output.getvalue(), "png"
+            image.convert("RGB").save(output, "JPEG", quality=quality, optimize=True, progressive=True)
+            return output.getvalue(), "jpg"
+    except Image.DecompressionBombError:
+        raise InvalidImageError("Image dimensions are too large")
+    except (OSError, SyntaxError, ValueError):
+        raise InvalidImageError("File is not a valid image")
+
+
+class ImageStore:
+    """
+    Receives image uploads and stores them through a pluggable backend.
+    Uploads are streamed into a spooled temp file with the size limit checked
+    per chunk, resized on a thread pool, and keyed by the sha256 of the
+    original bytes, so the same logo or banner is only processed and uploaded once.
+    """
+
+    def __init__(self, storage=None, workers: int = IMAGE_WORKERS, max_bytes: int = MAX_UPLOAD_BYTES):
+        self.storage = storage
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self._executor = None
+        self._in_flight = {}
+        self.stats = {"received": 0, "rejected": 0, "stored": 0, "deduplicated": 0, "bytes_in": 0, "bytes_out": 0}
+        self._process_seconds = 0.0
+
+    def _get_storage(self):
+        if self.storage is None:
+            if UPLOAD_STORAGE not in STORAGE_BACKENDS:
+                raise RuntimeError(f"Unknown UPLOAD_STORAGE {UPLOAD_STORAGE!r}")
+            self.storage = STORAGE_BACKENDS[UPLOAD_STORAGE]()
+        return self.storage
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="image")
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def receive(self, upload: UploadFile) -> SpooledUpload:
+        """Copies an upload into a spooled temp file, rejecting it with a 413 once it passes max_bytes"""
+        spooled = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+        digest, size = hashlib.sha256(), 0
+        try:
+            while chunk := await upload.read(UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > self.max_bytes:
+                    self.stats["rejected"] += 1
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Image is larger than {self.max_bytes // (1024 * 1024)} MB"
+                    )
+                digest.update(chunk)
+                spooled.write(chunk)
+        except BaseException:
+            spooled.close()
+            raise
+        if size == 0:
+            spooled.close()
+            raise HTTPException(status_code=400, detail="Image file is empty")
+        self.stats["received"] += 1
+        self.stats["bytes_in"] += size
+        return SpooledUpload(spooled, size, digest.hexdigest(), upload.filename)
+
+    async def verify(self, upload: SpooledUpload):
+        """Raises InvalidImageError if the upload is not a readable image"""
+        await asyncio.get_running_loop().run_in_executor(self._get_executor(), verify_image, upload.file)
+
+    async def store(self, upload: SpooledUpload, folder: str) -> str:
+        """Returns the URL of the stored image, uploading it only if these bytes were never stored before"""
+        storage = self._get_storage()
+        key = f"{storage.name}:{upload.sha256}"
+        existing = await uploads_collection.find_one({"_id": key}, {"url": 1})
+        if existing:
+            self.stats["deduplicated"] += 1
+            return existing["url"]
+        # Concurrent stores of the same bytes in this worker share one processing and upload
+        if key in self._in_flight:
+            self.stats["deduplicated"] += 1
+            return await asyncio.shield(self._in_flight[key])
+
+        task = asyncio.ensure_future(self._process_and_save(storage, key, upload, folder))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await task
+
+    async def _process_and_save(self, storage, key: str, upload: SpooledUpload, folder: str) -> str:
+        started_at = time.perf_counter()
+        data, extension = await asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), prepare_image, upload.file
+        )
+        self._process_seconds += time.perf_counter() - started_at
+
+        # Named by content, so two requests racing on the same image write the same object
+        url = await storage.save(data, folder, upload.sha256[:32], extension)
+        await uploads_collection.update_one(
+            {"_id": key},
+            {"$setOnInsert": {"url": url, "bytes": len(data), "created_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+        self.stats["stored"] += 1
+        self.stats["bytes_out"] += len(data)
+        return url
+
+    async def receive_and_store(self, upload: UploadFile, folder: str) -> str:
+        spooled = await self.receive(upload)
+        try:
+            return await self.store(spooled, folder)
+        finally:
+            spooled.close()
+
+    def snapshot(self) -> dict:
+        processed = self.stats["stored"]
+        return {
+            **self.stats,
+            "storage": self._get_storage().name,
+            "avg_process_ms": round(self._process_seconds / processed * 1000, 2) if processed else None,
+        }
+
+
+image_store = ImageStore()
@@ -0,0 +1,90 @@
+import hashlib
+import logging
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Optional
+from fastapi import Request
+from fastapi.responses import Response
+from database.database import stats_collection
+from services.response_cache import EVENTS_NAMESPACE, event_namespace, response_cache
+
+logger = logging.getLogger(__name__)
+
+# Document in the stats collection whose version goes up on every event write,
+# so list ETags come from one small read instead of hashing the results
+EVENTS_VERSION_ID = "events_version"
+
+
+def versioned(update: dict) -> dict:
+    """Adds the per-event version bump and updated_at to an update document"""
+    update = dict(update)
+    update["$inc"] = {**update.get("$inc", {}), "version": 1}
+    update["$set"] = {**update.get("$set", {}), "updated_at": datetime.now(timezone.utc)}
+    return update
+
+
+async def bump_events_version():
+    try:
+        await stats_collection.update_one(
+            {"_id": EVENTS_VERSION_ID},
+            {"$inc": {"version": 1}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+    except Exception as e:
+        logger.error(f"Failed to bump events version: {e}")
+
+
+async def get_events_version() -> tuple:
+    """Returns (version, updated_at) for the events collection as a whole"""
+    doc = await stats_collection.find_one({"_id": EVENTS_VERSION_ID})
+    if not doc:
+        return 0, None
+    return doc.get("version", 0), doc.get("updated_at")
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag over the given parts (versions, ids, query string)"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def _http_date(value) -> Optional[str]:
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        # Mongo hands back naive UTC datetimes
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def validator_headers(etag: str, last_modified=None) -> dict:
+    headers = {"ETag": etag}
+    http_date = _http_date(last_modified)
+    if http_date:
+        headers["Last-Modified"] = http_date
+    return headers
+
+
+def not_modified(request: Request, etag: str, last_modified=None) -> Optional[Response]:
+    """
+    Returns a 304 response if the client's If-None-Match already has this ETag,
+    otherwise None. If-Modified-Since is not consulted: it only has one second
+    resolution, and every resource here has an ETag.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" in candidates or etag in candidates:
+        return Response(status_code=304, headers=validator_headers(etag, last_modified))
+    return None
+
+
+async def mark_events_changed(*event_ids: int):
+    """
+    Call after any event write. The response cache is invalidated before the
+    version moves on, so a new ETag is never paired with a stale cached body.
+    """
+    await response_cache.invalidate(EVENTS_NAMESPACE, *(event_namespace(event_id) for event_id in event_ids))
+    await bump_events_version()
@@ -0,0 +1,119 @@
+"""
+Shared fixtures. The services reach MongoDB through database.database.db, which
+the db fixture points at an in-memory mongomock database behind the async API
+PyMongo's AsyncMongoClient exposes.
+"""
+import asyncio
+import mongomock
+import pytest
+from mongomock import aggregate
+from database import database
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+_handle_type_convertion_operator = aggregate._Parser._handle_type_convertion_operator
+
+
+def _handle_convert(self, operator, values):
+    # mongomock does not implement $convert; the app only uses it to convert to int
+    if operator != "$convert" or values.get("to") not in ("int", 16):
+        return _handle_type_convertion_operator(self, operator, values)
+    try:
+        value = self.parse(values["input"])
+    except KeyError:
+        value = None
+    if value is None:
+        return self.parse(values["onNull"]) if "onNull" in values else None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        if "onError" in values:
+            return self.parse(values["onError"])
+        raise
+
+
+aggregate._Parser._handle_type_convertion_operator = _handle_convert
+
+
+class AsyncCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def skip(self, count):
+        self._cursor = self._cursor.skip(count)
+        return self
+
+    def limit(self, count):
+        self._cursor = self._cursor.limit(count)
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    async def to_list(self, length=None):
+        await asyncio.sleep(0)
+        return list(self._cursor)
+
+    async def close(self):
+        pass
+
+    def __aiter__(self):
+        self._iterator = iter(self._cursor)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class AsyncCollection:
+    """
+    A mongomock collection with the async methods of an AsyncCollection. Each
+    call yields to the event loop first, like a round trip to the server, so
+    tasks run with asyncio.gather interleave between their operations.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.name = collection.name
+
+    def find(self, *args, **kwargs):
+        return AsyncCursor(self._collection.find(*args, **kwargs))
+
+    async def aggregate(self, *args, **kwargs):
+        await asyncio.sleep(0)
+        return AsyncCursor(self._collection.aggregate(*args, **kwargs))
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            await asyncio.sleep(0)
+            return method(*args, **kwargs)
+        return call
+
+
+class AsyncDatabase:
+    def __init__(self):
+        # The plain mongomock database, for setup and checks in synchronous tests
+        self.sync = mongomock.MongoClient().get_database("pledgeit_test")
+
+    def __getitem__(self, name):
+        return AsyncCollection(self.sync[name])
+
+
+@pytest.fixture
+def db(monkeypatch):
+    test_db = AsyncDatabase()
+    monkeypatch.setattr(database, "db", test_db)
+    return test_db
@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from database.database import events_collection, registrations_collection, volunteers_collection
+from services.attendance import ATTENDANCE_POINTS, record_attendance
+from services.idempotency import run_idempotent
+from services.jobs import job_queue
+from services.leaderboard import leaderboard
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def running_job_queue():
+    await job_queue.start()
+    yield job_queue
+    await job_queue.stop()
+
+
+@pytest.fixture
+async def volunteer_id(db, running_job_queue):
+    await events_collection.insert_one({
+        "event_id": 1, "event_name": "Beach Cleanup", "organization": "PledgeIt", "date": "2030-01-01",
+        "time": "09:00", "venue": "Beach", "address": "Galle Face", "contact_email": "events@pledgeit.lk",
+    })
+    result = await volunteers_collection.insert_one({
+        "first_name": "Amaya", "last_name": "Perera", "email": "amaya@example.com",
+        "points": 0, "events_attended": 0, "attended_events": [],
+    })
+    await registrations_collection.insert_one({"event_id": 1, "volunteer_id": str(result.inserted_id)})
+    return str(result.inserted_id)
+
+
+async def scan(operation) -> object:
+    try:
+        return await operation()
+    except HTTPException as e:
+        return e.status_code
+
+
+async def test_concurrent_scans_award_points_once(volunteer_id):
+    enqueued = job_queue.stats["enqueued"]
+
+    results = await asyncio.gather(*(scan(lambda: record_attendance(volunteer_id, 1)) for _ in range(100)))
+
+    confirmed = [result for result in results if isinstance(result, dict)]
+    assert len(confirmed) == 1
+    assert confirmed[0]["total_points"] == ATTENDANCE_POINTS
+    assert results.count(400) == 99
+
+    volunteer = await volunteers_collection.find_one({"email": "amaya@example.com"})
+    assert volunteer["points"] == ATTENDANCE_POINTS
+    assert volunteer["events_attended"] == 1
+    assert volunteer["attended_events"] == ["1"]
+    assert leaderboard.rank(volunteer_id) is not None
+    # One confirmation email
+    assert job_queue.stats["enqueued"] == enqueued + 1
+
+
+async def test_scan_requires_registration(volunteer_id):
+    await registrations_collection.delete_many({})
+
+    assert await scan(lambda: record_attendance(volunteer_id, 1)) == 400
+    assert await scan(lambda: record_attendance(volunteer_id, 2)) == 404
+
+
+async def test_retries_with_the_same_idempotency_key_replay_the_response(volunteer_id):
+    def attempt():
+        return scan(lambda: run_idempotent(f"scan:{volunteer_id}:1", "key-1", lambda: record_attendance(volunteer_id, 1)))
+
+    results = await asyncio.gather(*(attempt() for _ in range(20)))
+
+    confirmed = [result for result in results if isinstance(result, dict)]
+    # Retries that arrive while the first is running are told to wait, later ones get its response
+    assert len(confirmed) + results.count(409) == 20
+    assert all(result == confirmed[0] for result in confirmed)
+    assert await attempt() == confirmed[0]
+
+    volunteer = await volunteers_collection.find_one({"email": "amaya@example.com"})
+    assert volunteer["points"] == ATTENDANCE_POINTS
+
+
+async def test_failed_attempt_releases_the_idempotency_key(volunteer_id):
+    await registrations_collection.delete_many({})
+    key_scope = f"scan:{volunteer_id}:1"
+
+    assert await scan(lambda: run_idempotent(key_scope, "key-2", lambda: record_attendance(volunteer_id, 1))) == 400
+
+    await registrations_collection.insert_one({"event_id": 1, "volunteer_id": volunteer_id})
+    response = await run_idempotent(key_scope, "key-2", lambda: record_attendance(volunteer_id, 1))
+    assert response["points_added"] == ATTENDANCE_POINTS
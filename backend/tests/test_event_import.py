@@ -0,0 +1,66 @@
+import pytest
+from fastapi.testclient import TestClient
+from database.database import events_collection, organizations_collection, volunteers_collection
+from main import app
+from routes.auth import create_access_token
+from services.versioning import make_etag
+
+CSV = (
+    "event_name,description,category,date,time,venue,city,address,duration,volunteer_requirements,"
+    "skills_required,contact_email,contact_person_name,contact_person_number,registration_deadline\n"
+    "Beach Cleanup,Clean the beach,Environment,2030-01-10,09:00,Beach,Colombo,Galle Face,3,20,"
+    "\"Teamwork, Stamina\",events@pledgeit.lk,Nimal,0771234567,2030-01-05\n"
+)
+
+
+@pytest.fixture
+def client(db):
+    # Without the lifespan: the in-memory database is already in place
+    return TestClient(app)
+
+
+def bearer(user_id, role: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'user_id': str(user_id), 'role': role})}"}
+
+
+def post_import(client, headers: dict):
+    return client.post("/events/import", files={"file": ("events.csv", CSV, "text/csv")}, headers=headers)
+
+
+@pytest.fixture
+def organization_id(db):
+    return db.sync[organizations_collection.name].insert_one({"name": "PledgeIt", "email": "team@pledgeit.lk"}).inserted_id
+
+
+def test_import_rejects_the_organization_email_header(client, db, organization_id):
+    response = post_import(client, {"X-Org-Email": "team@pledgeit.lk"})
+
+    assert response.status_code == 401
+    assert db.sync[events_collection.name].count_documents({}) == 0
+
+
+def test_import_is_for_organizations_only(client, db):
+    volunteer_id = db.sync[volunteers_collection.name].insert_one({"email": "amaya@example.com"}).inserted_id
+
+    assert post_import(client, bearer(volunteer_id, "volunteer")).status_code == 403
+
+
+def test_import_creates_events_for_the_token_organization(client, db, organization_id):
+    response = post_import(client, bearer(organization_id, "organization"))
+
+    assert response.status_code == 200
+    assert response.json()["imported"] == 1
+    [event] = db.sync[events_collection.name].find({"event_id": {"$exists": True}})
+    assert event["organization"] == "PledgeIt"
+
+
+def test_events_that_cannot_be_queued_are_failed_with_a_new_version(client, db, organization_id):
+    # Without the lifespan the job queue is not running, so queueing the processing fails
+    response = post_import(client, bearer(organization_id, "organization"))
+    [event_id] = response.json()["event_ids"]
+
+    event = db.sync[events_collection.name].find_one({"event_id": event_id})
+    assert event["processing_status"] == "failed"
+    assert event["version"] == 2
+    # The per-event ETag moves with the version, so clients do not keep a cached "pending" copy
+    assert client.get(f"/events/{event_id}").headers["ETag"] != make_etag("event", event_id, 1)
@@ -0,0 +1,52 @@
+import pytest
+from database.database import events_collection
+from services.event_loader import EventLoader, load_events, normalize_event_ids
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def events(db):
+    await events_collection.insert_many([
+        {"event_id": event_id, "event_name": f"Event {event_id}", "category": "Education"}
+        for event_id in range(1, 11)
+    ])
+
+
+def test_normalize_event_ids_converts_and_deduplicates():
+    assert normalize_event_ids(["3", 1, 3, " 2 ", "x", True, 1.5, "-4"]) == [3, 1, 2, -4]
+
+
+async def test_load_many_is_one_query_per_batch(events):
+    loader = EventLoader(batch_size=4)
+
+    loaded = await loader.load_many(range(1, 11))
+
+    assert [event["event_id"] for event in loaded] == list(range(1, 11))
+    assert loader.round_trips == 3
+
+
+async def test_results_follow_the_requested_order_without_missing_ids(events):
+    loader = EventLoader()
+
+    loaded = await loader.load_many(["7", 2, 99, 7, 5])
+
+    assert [event["event_id"] for event in loaded] == [7, 2, 5]
+    assert loader.round_trips == 1
+
+
+async def test_loaded_and_missing_ids_are_not_fetched_again(events):
+    loader = EventLoader()
+    await loader.load_many([1, 2, 99])
+
+    assert (await loader.load(2))["event_id"] == 2
+    assert await loader.load(99) is None
+    await loader.load_many([1, 3])
+
+    assert loader.round_trips == 2
+
+
+async def test_projection_keeps_event_id(events):
+    [event] = await load_events([4], {"_id": 0, "category": 1})
+
+    assert event == {"event_id": 4, "category": "Education"}
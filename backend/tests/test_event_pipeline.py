@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+from database.database import events_collection, organizations_collection
+from services.event_pipeline import (
+    PROCESS_IMPORTED_EVENTS_JOB,
+    PROCESSING_FAILED,
+    PROCESSING_PENDING,
+    PROCESSING_READY,
+    sweep_stale_events,
+)
+from services.jobs import JobQueue, job_queue
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_stop_finishes_queued_jobs():
+    queue = JobQueue(workers=2)
+    done = []
+
+    @queue.register("slow")
+    async def slow(payload):
+        await asyncio.sleep(0.01)
+        done.append(payload["n"])
+
+    await queue.start()
+    for n in range(10):
+        await queue.enqueue("slow", {"n": n})
+    await queue.stop(timeout=5)
+
+    assert sorted(done) == list(range(10))
+    with pytest.raises(RuntimeError):
+        await queue.enqueue("slow", {"n": 10})
+
+
+async def test_stop_gives_up_after_the_timeout_and_drops_waiting_retries():
+    queue = JobQueue(workers=1, retry_base_delay=0.05)
+    calls = []
+
+    @queue.register("flaky")
+    async def flaky(payload):
+        calls.append(payload["n"])
+        raise RuntimeError("upstream down")
+
+    @queue.register("stuck")
+    async def stuck(payload):
+        await asyncio.sleep(60)
+
+    await queue.start()
+    await queue.enqueue("flaky", {"n": 1})
+    await asyncio.sleep(0.01)
+    await queue.enqueue("stuck", {})
+    await queue.stop(timeout=0.1)
+    await asyncio.sleep(0.1)
+
+    # The retry waiting out its backoff was cancelled, and stop() did not wait for the stuck job
+    assert calls == [1]
+    assert queue.stats["retried"] == 1
+
+
+@pytest.fixture
+async def queued_jobs(db, monkeypatch):
+    # A queue without workers, so re-queued jobs can be inspected instead of run
+    monkeypatch.setattr(job_queue, "workers", 0)
+    await job_queue.start()
+    yield job_queue._queue
+    await job_queue.stop(timeout=0)
+
+
+async def insert_event(event_id: int, status: str, minutes_ago: int, image_url: str = "https://img/1.jpg"):
+    await events_collection.insert_one({
+        "event_id": event_id, "organization": "PledgeIt", "address": "Colombo", "image_url": image_url,
+        "processing_status": status, "updated_at": datetime.now(timezone.utc) - timedelta(minutes=minutes_ago),
+    })
+
+
+async def status_of(event_id: int) -> str:
+    return (await events_collection.find_one({"event_id": event_id}))["processing_status"]
+
+
+async def test_sweep_recovers_only_stale_events(queued_jobs):
+    await organizations_collection.insert_one({"name": "PledgeIt", "email": "team@pledgeit.lk"})
+    await insert_event(1, PROCESSING_PENDING, minutes_ago=120, image_url="")
+    await insert_event(2, "geocoding", minutes_ago=120)
+    await insert_event(3, "sending_qr_email", minutes_ago=120)
+    await insert_event(4, PROCESSING_PENDING, minutes_ago=1)
+    await insert_event(5, PROCESSING_READY, minutes_ago=120)
+
+    result = await sweep_stale_events()
+
+    assert result == {"failed": [1], "requeued": [2, 3]}
+    assert [await status_of(event_id) for event_id in range(1, 6)] == [
+        PROCESSING_FAILED, PROCESSING_PENDING, PROCESSING_PENDING, PROCESSING_PENDING, PROCESSING_READY
+    ]
+    job = queued_jobs.get_nowait()
+    assert job["name"] == PROCESS_IMPORTED_EVENTS_JOB
+    assert job["payload"] == {"event_ids": [2, 3], "organization_email": "team@pledgeit.lk"}
+    assert queued_jobs.empty()
+    # Re-queued events are fresh again, so the next sweep leaves them to their job
+    assert await sweep_stale_events() == {"failed": [], "requeued": []}
+
+
+async def test_concurrent_sweeps_queue_each_event_once(queued_jobs):
+    for event_id in range(1, 21):
+        await insert_event(event_id, PROCESSING_PENDING, minutes_ago=120)
+
+    results = await asyncio.gather(*(sweep_stale_events() for _ in range(4)))
+
+    requeued = [event_id for result in results for event_id in result["requeued"]]
+    assert sorted(requeued) == list(range(1, 21))
+    jobs = [queued_jobs.get_nowait() for _ in range(queued_jobs.qsize())]
+    assert sorted(event_id for job in jobs for event_id in job["payload"]["event_ids"]) == list(range(1, 21))
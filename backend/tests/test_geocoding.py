@@ -0,0 +1,94 @@
+import asyncio
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+from services.geocoding import Geocoder, GeocodingError
+
+pytestmark = pytest.mark.anyio
+
+# Addresses the stub knows, as Nominatim would answer them
+PLACES = {"Galle Face, Colombo": [{"lat": "6.9271", "lon": "79.8612"}], "Nowhere": []}
+
+
+class StubNominatim(BaseHTTPRequestHandler):
+    hits = Counter()
+
+    def do_GET(self):
+        address = parse_qs(urlparse(self.path).query)["q"][0]
+        self.hits[address] += 1
+        # Slow enough that concurrent lookups overlap
+        time.sleep(0.05)
+        if address not in PLACES:
+            self.send_response(500)
+            self.end_headers()
+            return
+        body = json.dumps(PLACES[address]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def nominatim():
+    StubNominatim.hits = Counter()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubNominatim)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/search", StubNominatim.hits
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+async def geocoder(db, nominatim):
+    url, _ = nominatim
+    geocoder = Geocoder(url=url, min_interval=0)
+    yield geocoder
+    await geocoder.aclose()
+
+
+async def test_lookups_are_cached(geocoder, nominatim):
+    url, hits = nominatim
+
+    assert await geocoder.get_coordinates("Galle Face, Colombo") == (6.9271, 79.8612)
+    assert await geocoder.get_coordinates("galle face,  colombo") == (6.9271, 79.8612)
+    assert await geocoder.get_coordinates("Nowhere") == (None, None)
+    assert await geocoder.get_coordinates("Nowhere") == (None, None)
+    # The cache is in Mongo, so another worker's geocoder finds it too
+    other = Geocoder(url=url, min_interval=0)
+    assert await other.get_coordinates("Galle Face, Colombo") == (6.9271, 79.8612)
+    await other.aclose()
+
+    assert hits == {"Galle Face, Colombo": 1, "Nowhere": 1}
+
+
+async def test_concurrent_lookups_for_one_address_share_a_request(geocoder, nominatim):
+    _, hits = nominatim
+
+    results = await asyncio.gather(*(geocoder.get_coordinates("Galle Face, Colombo") for _ in range(20)))
+
+    assert set(results) == {(6.9271, 79.8612)}
+    assert hits == {"Galle Face, Colombo": 1}
+
+
+async def test_upstream_errors_raise_and_are_not_cached(geocoder, nominatim):
+    _, hits = nominatim
+
+    results = await asyncio.gather(
+        *(geocoder.get_coordinates("Kandy") for _ in range(5)), return_exceptions=True
+    )
+    with pytest.raises(GeocodingError):
+        await geocoder.get_coordinates("Kandy")
+
+    assert all(isinstance(result, GeocodingError) for result in results)
+    # Each failure reaches the callers waiting on it; the next lookup asks again
+    assert hits == {"Kandy": 2}
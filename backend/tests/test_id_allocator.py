@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from database.database import counters_collection, events_collection
+from services.id_allocator import EVENT_ID_COUNTER, LEGACY_EVENT_COUNTER_ID, IdAllocator
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_allocations_are_unique(db):
+    allocator = IdAllocator(block_size=7)
+
+    batches = await asyncio.gather(*(allocator.allocate(count) for count in [1, 3, 1, 10, 2] * 40))
+
+    ids = [event_id for batch in batches for event_id in batch]
+    assert len(ids) == len(set(ids)) == 17 * 40
+    # Allocations wait for an in-flight lease instead of leasing their own, so no ids are skipped
+    assert sorted(ids) == list(range(1, 17 * 40 + 1))
+    assert all(len(batch) == count for batch, count in zip(batches, [1, 3, 1, 10, 2] * 40))
+
+
+async def test_workers_sharing_a_counter_never_repeat_ids(db):
+    # Each allocator stands in for one worker process with its own leases
+    workers = [IdAllocator(block_size=5) for _ in range(4)]
+
+    batches = await asyncio.gather(*(workers[i % 4].allocate(1 + i % 3) for i in range(200)))
+
+    ids = [event_id for batch in batches for event_id in batch]
+    assert len(ids) == len(set(ids))
+    counter = await counters_collection.find_one({"_id": EVENT_ID_COUNTER})
+    assert max(ids) <= counter["value"]
+
+
+async def test_large_allocation_leases_what_it_needs_at_once(db):
+    allocator = IdAllocator(block_size=20)
+
+    ids = await allocator.allocate(250)
+
+    assert ids == list(range(1, 251))
+    assert allocator.stats["leases"] == 1
+
+
+async def test_seed_starts_after_the_legacy_counter_and_existing_events(db):
+    await events_collection.insert_many([
+        {"_id": LEGACY_EVENT_COUNTER_ID, "count": 40},
+        {"event_id": 57, "event_name": "Tree Planting"},
+    ])
+
+    first, second = await asyncio.gather(IdAllocator(block_size=20).allocate(1), IdAllocator(block_size=20).allocate(1))
+
+    assert sorted(first + second) == [58, 78]
+    assert await events_collection.find_one({"_id": LEGACY_EVENT_COUNTER_ID}) is None
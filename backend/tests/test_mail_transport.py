@@ -0,0 +1,112 @@
+import asyncio
+import socket
+from email.message import EmailMessage
+import pytest
+from aiosmtpd.controller import Controller
+from services.mail_transport import MailOutbox, SMTPConnectionPool
+
+pytestmark = pytest.mark.anyio
+
+
+class Sink:
+    """Accepts every message and remembers which connection delivered it"""
+
+    def __init__(self):
+        self.received = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received.append((session.peer, envelope.rcpt_tos))
+        return "250 OK"
+
+    def connections(self) -> int:
+        return len({peer for peer, _ in self.received})
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_sink():
+    sink = Sink()
+    controller = Controller(sink, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield sink, controller
+    controller.stop()
+
+
+@pytest.fixture
+def pool(smtp_sink, monkeypatch):
+    _, controller = smtp_sink
+    monkeypatch.setenv("EMAIL_HOST", controller.hostname)
+    monkeypatch.setenv("EMAIL_PORT", str(controller.port))
+    monkeypatch.setenv("EMAIL_USE_TLS", "false")
+    monkeypatch.delenv("EMAIL_USER", raising=False)
+    pool = SMTPConnectionPool.from_env()
+    pool.size = 1
+    yield pool
+    pool.close()
+
+
+def message(n: int) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = "events@pledgeit.lk"
+    message["To"] = f"volunteer{n}@example.com"
+    message["Subject"] = "Your QR code"
+    message.set_content("See you there")
+    return message
+
+
+async def delivered(sink: Sink, count: int):
+    for _ in range(500):
+        if len(sink.received) >= count:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"{len(sink.received)} of {count} messages arrived")
+
+
+async def test_outbox_sends_batches_over_one_connection(smtp_sink, pool):
+    sink, _ = smtp_sink
+    outbox = MailOutbox(batch_size=10, linger=0.05)
+    await outbox.start(pool)
+
+    for n in range(25):
+        assert outbox.submit(message(n))
+    await delivered(sink, 25)
+    # A later batch goes out on the idle pooled session
+    for n in range(25, 30):
+        outbox.submit(message(n))
+    await delivered(sink, 30)
+    await outbox.stop()
+
+    assert sorted(rcpt for _, [rcpt] in sink.received) == sorted(f"volunteer{n}@example.com" for n in range(30))
+    assert pool.stats["connections_opened"] == 1
+    assert sink.connections() == 1
+    assert pool.stats["sent"] == 30
+
+
+def test_pool_reconnects_when_the_server_dropped_the_session():
+    first, second = Sink(), Sink()
+    servers = [Controller(sink, hostname="127.0.0.1", port=free_port()) for sink in (first, second)]
+    for server in servers:
+        server.start()
+    pool = SMTPConnectionPool("127.0.0.1", servers[0].port, use_tls=False, size=1)
+    try:
+        assert pool.send_many([message(1), message(2)]) == [True, True]
+        # The server goes away with the pooled session, and comes back elsewhere
+        servers[0].stop()
+        pool.port = servers[1].port
+        assert pool.send(message(3))
+        # keepalive=0: the idle session is checked with a NOOP and kept
+        pool.keepalive = 0
+        assert pool.send(message(4))
+    finally:
+        pool.close()
+        servers[1].stop()
+
+    assert pool.stats["connections_opened"] == 2
+    assert pool.stats["reconnects"] == 1
+    assert first.connections() == second.connections() == 1
+    assert [rcpt for _, [rcpt] in second.received] == ["volunteer3@example.com", "volunteer4@example.com"]
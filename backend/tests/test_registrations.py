@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from database.database import events_collection, registrations_collection, volunteers_collection
+from database.indexes import INDEXES
+from models.update_models import EventUpdate
+from routes.events import join_event, leave_event, update_event
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_event_and_volunteers(capacity, volunteers: int) -> list:
+    await registrations_collection.create_indexes(INDEXES[registrations_collection.name])
+    await events_collection.insert_one({"event_id": 1, "volunteer_requirements": capacity, "total_registered_volunteers": 0})
+    result = await volunteers_collection.insert_many([{"first_name": f"Volunteer {i}"} for i in range(volunteers)])
+    return [{"user_id": str(volunteer_id), "role": "volunteer"} for volunteer_id in result.inserted_ids]
+
+
+async def join(user: dict) -> int:
+    try:
+        await join_event(1, user=user)
+    except HTTPException as e:
+        return e.status_code
+    return 200
+
+
+async def registered_count() -> int:
+    event = await events_collection.find_one({"event_id": 1})
+    return event["total_registered_volunteers"]
+
+
+async def test_concurrent_joins_never_overbook(db):
+    users = await create_event_and_volunteers(capacity=25, volunteers=300)
+
+    statuses = await asyncio.gather(*(join(user) for user in users))
+
+    assert statuses.count(200) == 25
+    assert statuses.count(409) == 275
+    assert await registered_count() == 25
+    # Rejected joins leave no registration behind
+    assert await registrations_collection.count_documents({"event_id": 1}) == 25
+
+
+async def test_capacity_stored_as_a_string_is_enforced(db):
+    users = await create_event_and_volunteers(capacity="5", volunteers=50)
+
+    statuses = await asyncio.gather(*(join(user) for user in users))
+
+    assert statuses.count(200) == 5
+    assert await registered_count() == 5
+
+
+async def test_repeated_joins_by_one_volunteer_take_one_place(db):
+    [user] = await create_event_and_volunteers(capacity=10, volunteers=1)
+
+    statuses = await asyncio.gather(*(join(user) for _ in range(50)))
+
+    assert statuses.count(200) == 1
+    assert statuses.count(400) == 49
+    assert await registered_count() == 1
+
+
+async def test_places_freed_by_leaving_are_taken_again(db):
+    users = await create_event_and_volunteers(capacity=10, volunteers=200)
+    members, waiting = users[:10], users[10:]
+    await asyncio.gather(*(join(user) for user in members))
+
+    leaving = members[:4]
+    _, statuses = await asyncio.gather(
+        asyncio.gather(*(leave_event(1, user=user) for user in leaving)),
+        asyncio.gather(*(join(user) for user in waiting)),
+    )
+
+    assert await registered_count() == await registrations_collection.count_documents({"event_id": 1})
+    assert await registered_count() == 10 - len(leaving) + statuses.count(200)
+    assert await registered_count() <= 10
+
+
+async def test_an_event_update_cannot_set_the_registration_count(db):
+    users = await create_event_and_volunteers(capacity=10, volunteers=3)
+    await events_collection.update_one({"event_id": 1}, {"$set": {"organization": "PledgeIt"}})
+    await asyncio.gather(*(join(user) for user in users))
+
+    await update_event(1, EventUpdate(total_registered_volunteers=0, venue="Hall B"), current_org={"name": "PledgeIt"})
+
+    event = await events_collection.find_one({"event_id": 1})
+    assert event["venue"] == "Hall B"
+    assert event["total_registered_volunteers"] == 3
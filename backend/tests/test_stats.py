@@ -0,0 +1,50 @@
+import asyncio
+import pytest
+from database.database import events_collection, organizations_collection, stats_collection, volunteers_collection
+from services.stats import DASHBOARD_STATS_ID, get_dashboard_stats, reconcile, record_event_created
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def collections(db):
+    await events_collection.insert_many([
+        {"event_id": event_id, "category": "Education" if event_id % 2 else "Health"} for event_id in range(1, 11)
+    ])
+    await volunteers_collection.insert_many([{"first_name": f"Volunteer {i}"} for i in range(3)])
+    await organizations_collection.insert_one({"name": "PledgeIt"})
+
+
+EXPECTED = {
+    "total_events": 10,
+    "total_volunteers": 3,
+    "total_organizations": 1,
+    "events_by_category": {"Education": 5, "Health": 5},
+}
+
+
+async def test_concurrent_first_builds_count_once(collections):
+    await asyncio.gather(*(reconcile() for _ in range(3)))
+
+    assert await get_dashboard_stats() == EXPECTED
+
+
+async def test_concurrent_runs_correct_drift_once(collections):
+    await reconcile()
+    await stats_collection.update_one(
+        {"_id": DASHBOARD_STATS_ID}, {"$inc": {"total_events": 4, "total_volunteers": -2, "events_by_category.Gone": 1}}
+    )
+
+    await asyncio.gather(*(reconcile() for _ in range(5)))
+
+    assert await get_dashboard_stats() == EXPECTED
+
+
+async def test_increments_during_a_run_are_kept(collections):
+    await reconcile()
+
+    await asyncio.gather(reconcile(), record_event_created("Health"))
+
+    stats = await get_dashboard_stats()
+    assert stats["total_events"] == 11
+    assert stats["events_by_category"]["Health"] == 6